@@ -0,0 +1,198 @@
+"""
+Measures how hard boards are to clear.
+
+Every board gets its 3BV, the least number of clicks that clears it, made
+up of one click for every opening, a region of empty cells that opens up
+all at once, and one for every numbered cell that isn't next to an
+opening. Those isolated numbers are also grouped into islands of numbers
+touching each other. Regions are found with a union-find over the cells
+in a single pass instead of flood filling the board.
+
+Running the module analyzes many seeded boards across a pool of worker
+processes and summarizes the metrics, or prints the metrics of every
+board as JSON lines with --jsonl.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Iterable, Iterator, List
+import argparse
+import itertools
+import json
+import statistics
+import time
+
+from explodey_sweeper import (
+    DEFAULT_BOARD_HEIGHT,
+    DEFAULT_BOARD_WIDTH,
+    DEFAULT_MINE_COUNT,
+    MINE_VALUE,
+    Board,
+)
+from parallel import map_in_order
+
+# Seeds analyzed by a worker process at a time
+CHUNK_SIZE = 1024
+
+
+@dataclass
+class BoardMetrics():
+    """
+    The difficulty metrics of one board:
+    seed: seed of the board
+    three_bv: least number of clicks needed to clear the board
+    openings: number of regions of empty cells
+    opening_cells: cells revealed by clicking every opening, cells next
+        to two openings are counted for both
+    largest_opening: cells revealed by clicking the largest opening
+    isolated_numbers: numbered cells that aren't next to an opening
+    islands: groups of isolated numbers touching each other
+    """
+    seed: int
+    three_bv: int
+    openings: int
+    opening_cells: int
+    largest_opening: int
+    isolated_numbers: int
+    islands: int
+
+
+def analyze_board(board: Board) -> BoardMetrics:
+    """
+    Returns the difficulty metrics of the board
+    """
+    counts = board.counts
+    neighbours = board.neighbours
+    size = len(counts)
+    parent = list(range(size))
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]
+            index = parent[index]
+        return index
+
+    # cells are joined to the neighbours that come before them, so every
+    # region is complete once the pass reaches its last cell
+    isolated = bytearray(size)
+    borders: List[int] = []
+    for index in range(size):
+        count = counts[index]
+        if count == MINE_VALUE:
+            continue
+        if count == 0:
+            for neighbour in neighbours[index]:
+                if neighbour < index and counts[neighbour] == 0:
+                    parent[find(neighbour)] = find(index)
+        elif any(counts[neighbour] == 0 for neighbour in neighbours[index]):
+            borders.append(index)
+        else:
+            isolated[index] = 1
+            for neighbour in neighbours[index]:
+                if neighbour < index and isolated[neighbour]:
+                    parent[find(neighbour)] = find(index)
+
+    opening_sizes = {}
+    islands = set()
+    isolated_numbers = 0
+    for index in range(size):
+        if counts[index] == 0:
+            root = find(index)
+            opening_sizes[root] = opening_sizes.get(root, 0) + 1
+        elif isolated[index]:
+            isolated_numbers += 1
+            islands.add(find(index))
+    # the numbers around an opening are revealed along with it
+    for index in borders:
+        for root in {find(neighbour) for neighbour in neighbours[index]
+                     if counts[neighbour] == 0}:
+            opening_sizes[root] += 1
+
+    return BoardMetrics(
+        seed=board.seed,
+        three_bv=len(opening_sizes) + isolated_numbers,
+        openings=len(opening_sizes),
+        opening_cells=sum(opening_sizes.values()),
+        largest_opening=max(opening_sizes.values(), default=0),
+        isolated_numbers=isolated_numbers,
+        islands=len(islands),
+    )
+
+
+def _analyze_seeds(width, height, mines, seeds) -> List[BoardMetrics]:
+    """
+    Analyzes a chunk of seeded boards inside a worker process
+    """
+    return [analyze_board(Board(width=width, height=height,
+                                number_of_mines=mines, seed=seed))
+            for seed in seeds]
+
+
+def analyze_seeds(width, height, mines, seeds: Iterable[int],
+                  workers=None) -> Iterator[BoardMetrics]:
+    """
+    Yields the metrics of the board of every seed in order, analyzed
+    across a pool of worker processes. Only a few chunks of seeds are in
+    flight at once so any number of boards can be streamed
+    """
+    seeds = iter(seeds)
+    chunks = iter(lambda: list(itertools.islice(seeds, CHUNK_SIZE)), [])
+    tasks = ((width, height, mines, chunk) for chunk in chunks)
+    for results in map_in_order(_analyze_seeds, tasks, workers):
+        yield from results
+
+
+def summarize(metrics: Iterable[BoardMetrics]):
+    """
+    Returns the number of boards and the mean, 10th, 50th and 90th
+    percentile of every metric
+    """
+    columns = {}
+    for board_metrics in metrics:
+        for name, value in asdict(board_metrics).items():
+            if name != "seed":
+                columns.setdefault(name, []).append(value)
+    summary = {"boards": len(columns.get("three_bv", []))}
+    for name, values in columns.items():
+        deciles = statistics.quantiles(values, n=10) if len(values) > 1 \
+            else values * 9
+        summary[name] = {
+            "mean": statistics.fmean(values),
+            "p10": deciles[0],
+            "p50": deciles[4],
+            "p90": deciles[8],
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=DEFAULT_BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_BOARD_HEIGHT)
+    parser.add_argument("--mines", type=int, default=DEFAULT_MINE_COUNT)
+    parser.add_argument("--boards", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first board")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--jsonl", action="store_true",
+                        help="print the metrics of every board as JSON "
+                             "lines instead of a summary")
+    args = parser.parse_args()
+
+    seeds = range(args.seed, args.seed + args.boards)
+    metrics = analyze_seeds(args.width, args.height, args.mines, seeds,
+                            args.workers)
+    if args.jsonl:
+        for board_metrics in metrics:
+            print(json.dumps(asdict(board_metrics)))
+        return
+
+    start = time.perf_counter()
+    summary = summarize(metrics)
+    seconds = time.perf_counter() - start
+    print(json.dumps(summary, indent=2))
+    print(f"{summary['boards']} boards in {seconds:.2f}s "
+          f"({summary['boards'] / seconds:.0f} boards/s)")
+
+
+if __name__ == "__main__":
+    main()
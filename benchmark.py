@@ -0,0 +1,253 @@
+"""
+Times the hot paths of explodey sweeper on seeded boards of many sizes and
+densities and writes the results as JSON so runs can be compared
+"""
+
+from dataclasses import dataclass
+from itertools import product
+from typing import Callable, Dict, List
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from explodey_sweeper import (
+    MINE_VALUE,
+    BitBoard,
+    Board,
+    Controller,
+    Display,
+    Game,
+    numpy,
+)
+
+# (width, height, mines) of every scenario from beginner boards up to
+# boards far larger than the game allows
+SCENARIOS = (
+    (9, 9, 10),
+    (16, 16, 40),
+    (30, 16, 99),
+    (30, 24, 200),
+    (100, 100, 1000),
+    (300, 300, 9000),
+    (300, 300, 27000),
+    (1000, 1000, 100000),
+)
+
+# mine density of the boards used to time wide-open flood fills
+OPEN_BOARD_DENSITY = 0.01
+
+# every BATCH_STEP-th cell is part of the batch of reveals that is timed
+BATCH_STEP = 7
+
+SEED = 1
+
+# Board classes every benchmark is run against
+BACKENDS = {
+    "board": Board,
+    "bitboard": BitBoard,
+}
+
+
+@dataclass
+class Result():
+    """
+    The timings of one benchmark on one scenario
+    """
+    name: str
+    scenario: str
+    backend: str
+    repeats: int
+    best: float
+    median: float
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "scenario": self.scenario,
+            "backend": self.backend,
+            "repeats": self.repeats,
+            "best": self.best,
+            "median": self.median,
+        }
+
+
+def time_function(setup: Callable[[], object], function: Callable,
+                  repeats: int) -> List[float]:
+    """
+    Calls setup then times function with what setup returned, repeats
+    times
+    """
+    timings = []
+    for _ in range(repeats):
+        argument = setup()
+        start = time.perf_counter()
+        function(argument)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def first_empty_cell(board: Board):
+    """
+    Returns the (x, y) of the first cell without any adjacent mines
+    """
+    index = board.counts.index(0)
+    return index % board.width, index // board.width
+
+
+def half_flagged_controller(board: Board):
+    """
+    Returns a Controller for the board with half of the mines flagged
+    """
+    controller = Controller(game=Game(board))
+    for x, y in sorted(board.mine_locations)[::2]:
+        board.flag_cell(x, y)
+        controller.flagged_locations.add((x, y))
+    return controller
+
+
+def run_benchmarks(scenarios=SCENARIOS, repeats=5,
+                   backends=tuple(BACKENDS)) -> List[Result]:
+    """
+    Runs every benchmark on every scenario with every backend
+    """
+    results = []
+    null_stream = open(os.devnull, 'w')
+    display = Display(stream=null_stream)
+
+    for (width, height, mines), backend in product(scenarios, backends):
+        scenario = f"{width}x{height}/{mines}"
+        board_class = BACKENDS[backend]
+        board = board_class(width=width, height=height,
+                            number_of_mines=mines, seed=SEED)
+        open_board = board_class(width=width, height=height,
+                                 number_of_mines=int(width * height *
+                                                     OPEN_BOARD_DENSITY),
+                                 seed=SEED)
+        open_cell = first_empty_cell(open_board)
+        # a spread out batch of safe cells revealed together
+        batch = [(index % width, index // width)
+                 for index in range(0, width * height, BATCH_STEP)
+                 if board.counts[index] != MINE_VALUE]
+
+        def reveal(board):
+            board.reveal_cell(*open_cell)
+
+        def reset_open_board():
+            open_board.reset()
+            return open_board
+
+        def reset_board():
+            board.reset()
+            return board
+
+        benchmarks: Dict[str, tuple] = {
+            "board_init": (
+                lambda: None,
+                lambda _: board_class(width=width, height=height,
+                                      number_of_mines=mines, seed=SEED),
+            ),
+            "fill_board_with_numbers": (
+                lambda: board,
+                lambda board: board.fill_board_with_numbers(),
+            ),
+            "reveal_cell_open_board": (reset_open_board, reveal),
+            "reveal_all_mines": (
+                reset_open_board,
+                lambda board: board.reveal_all_mines(),
+            ),
+            "check_win": (
+                lambda: half_flagged_controller(board),
+                lambda controller: controller.check_win(),
+            ),
+            "display_board": (
+                lambda: board,
+                lambda board: display.display_board(board, mines),
+            ),
+            "reveal_cells_batch": (
+                reset_board,
+                lambda board: board.reveal_cells(batch),
+            ),
+        }
+        for name, (setup, function) in benchmarks.items():
+            timings = time_function(setup, function, repeats)
+            results.append(Result(name, scenario, backend, repeats,
+                                  min(timings), statistics.median(timings)))
+        board.reset()
+
+    null_stream.close()
+    return results
+
+
+def compare(results: List[Result], previous: dict, threshold: float):
+    """
+    Returns a line for every result whose best time is more than threshold
+    times slower than the same benchmark in a previous run
+    """
+    # runs from before there were backends only timed the board backend
+    before = {(result["name"], result["scenario"],
+               result.get("backend", "board")): result["best"]
+              for result in previous["results"]}
+    regressions = []
+    for result in results:
+        old = before.get((result.name, result.scenario, result.backend))
+        if old and result.best > old * threshold:
+            regressions.append(
+                f"{result.name} {result.scenario} {result.backend}: "
+                f"{old * 1000:.3f} ms -> {result.best * 1000:.3f} ms"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="write the JSON results to a file")
+    parser.add_argument("--compare",
+                        help="JSON results of an earlier run to check for "
+                             "regressions against")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="how many times slower a benchmark can get "
+                             "before it counts as a regression")
+    parser.add_argument("--quick", action="store_true",
+                        help="skip the boards larger than 100x100")
+    parser.add_argument("--backend", choices=BACKENDS, action="append",
+                        help="only time this board backend, can be given "
+                             "more than once")
+    args = parser.parse_args()
+
+    scenarios = SCENARIOS
+    if args.quick:
+        scenarios = [scenario for scenario in SCENARIOS
+                     if scenario[0] * scenario[1] <= 100 * 100]
+    results = run_benchmarks(scenarios, args.repeats,
+                             args.backend or tuple(BACKENDS))
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": numpy.__version__ if numpy is not None else None,
+        "results": [result.as_dict() for result in results],
+    }
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as previous:
+            regressions = compare(results, json.load(previous),
+                                  args.threshold)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Exports seeded boards and positions from played games as a dataset for
+training and testing bots.
+
+Every position is stored as three arrays the size of the board, one byte
+per cell: mines (1 where there is a mine), counts (the number on every
+cell, MINE_VALUE on mines) and revealed (1 where the cell is revealed),
+along with the seed of its board and the number of moves played before
+it. Without --positions every position is a new board with nothing
+revealed. With --positions N every game is played out by the solver and
+N of the positions it went through are picked at random.
+
+The seeds are split into shards that worker processes write on their
+own, so only one shard per worker is ever in memory. Shards are .npz
+files when NumPy is installed, otherwise every array is written to its
+own raw file that numpy.memmap or numpy.fromfile can open. manifest.json
+lists every shard with the dtype and shape of its arrays.
+"""
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from explodey_sweeper import (
+    DEFAULT_BOARD_HEIGHT,
+    DEFAULT_BOARD_WIDTH,
+    DEFAULT_MINE_COUNT,
+    DIGIT_BYTES,
+    MINE_DIGITS,
+    REVEALED_DIGITS,
+    Board,
+    Game,
+    State,
+    numpy,
+)
+from parallel import map_in_order
+from solver import SolverStrategy
+
+NPZ = "npz"
+RAW = "raw"
+FORMATS = (NPZ, RAW)
+
+MANIFEST = "manifest.json"
+# Boards written to each shard
+DEFAULT_SHARD_BOARDS = 4096
+
+# dtype of every array, the cell arrays have one row for each position
+# and the others one value for each position
+CELL_ARRAYS = ("mines", "counts", "revealed")
+DTYPES = {
+    "mines": "|u1",
+    "counts": "|u1",
+    "revealed": "|u1",
+    "seeds": "<i8",
+    "moves": "<i4",
+}
+
+# (moves, mines, counts, revealed) of one position
+Position = Tuple[int, bytes, bytes, bytes]
+
+
+def position_arrays(board: Board) -> Tuple[bytes, bytes, bytes]:
+    """
+    Returns the mines, counts and revealed bytes of the board, one byte per
+    cell in y*width+x order
+    """
+    counts = bytes(board.counts)
+    return (counts.translate(MINE_DIGITS).translate(DIGIT_BYTES),
+            counts,
+            board.cell_states().translate(REVEALED_DIGITS).translate(
+                DIGIT_BYTES))
+
+
+def board_positions(width, height, mines, seed, positions) -> List[Position]:
+    """
+    Returns the positions recorded for one seed. With positions the game is
+    played by the solver and that many of the positions before each of its
+    moves are sampled, in the order they were played
+    """
+    board = Board(width=width, height=height, number_of_mines=mines,
+                  seed=seed)
+    if not positions:
+        return [(0, *position_arrays(board))]
+
+    # mines are never moved off the first click, so every position has
+    # the layout its seed builds
+    game = Game(board, safe_first_click=False)
+    player = SolverStrategy(game)
+    # reservoir sampling, so only the positions that are kept are copied
+    rng = random.Random(seed)
+    sampled: List[Position] = []
+    seen = 0
+    while game.state == State.PLAYING:
+        if seen < positions:
+            sampled.append((game.moves, *position_arrays(board)))
+        else:
+            slot = rng.randrange(seen + 1)
+            if slot < positions:
+                sampled[slot] = (game.moves, *position_arrays(board))
+        seen += 1
+        game.apply_move(*player.next_move())
+    return sorted(sampled)
+
+
+def _write_shard(directory, index, width, height, mines, seeds, positions,
+                 shard_format) -> Dict:
+    """
+    Writes the positions of a range of seeds to one shard inside a worker
+    process and returns its manifest entry
+    """
+    name = f"shard-{index:05d}"
+    cells = {array_name: bytearray() for array_name in CELL_ARRAYS}
+    seed_values = array('q')
+    move_values = array('i')
+    for seed in seeds:
+        for moves, *board_arrays in board_positions(width, height, mines,
+                                                    seed, positions):
+            for array_name, data in zip(CELL_ARRAYS, board_arrays):
+                cells[array_name] += data
+            seed_values.append(seed)
+            move_values.append(moves)
+    count = len(seed_values)
+    entry = {"index": index, "first_seed": seeds.start,
+             "boards": len(seeds), "positions": count}
+
+    if shard_format == NPZ:
+        arrays = {array_name: numpy.frombuffer(data, numpy.uint8).reshape(
+                      count, height, width)
+                  for array_name, data in cells.items()}
+        arrays["seeds"] = numpy.frombuffer(seed_values, numpy.int64)
+        arrays["moves"] = numpy.frombuffer(move_values, numpy.int32)
+        entry["file"] = name + ".npz"
+        numpy.savez(os.path.join(directory, entry["file"]), **arrays)
+        return entry
+
+    if sys.byteorder == "big":
+        seed_values.byteswap()
+        move_values.byteswap()
+    entry["files"] = {}
+    for array_name, data in itertools.chain(
+            cells.items(), (("seeds", seed_values), ("moves", move_values))):
+        entry["files"][array_name] = f"{name}.{array_name}.bin"
+        with open(os.path.join(directory, entry["files"][array_name]),
+                  'wb') as output:
+            output.write(data)
+    return entry
+
+
+@dataclass
+class ExportReport():
+    """
+    Totals for one export
+    """
+    shards: List[Dict] = field(default_factory=list)
+    seconds: float = field(default=0.0)
+    workers: int = field(default=1)
+
+    @property
+    def boards(self):
+        return sum(shard["boards"] for shard in self.shards)
+
+    @property
+    def positions(self):
+        return sum(shard["positions"] for shard in self.shards)
+
+    @property
+    def boards_per_second(self):
+        return self.boards / self.seconds if self.seconds else 0.0
+
+    @property
+    def positions_per_second(self):
+        return self.positions / self.seconds if self.seconds else 0.0
+
+
+def export(directory, boards, width=DEFAULT_BOARD_WIDTH,
+           height=DEFAULT_BOARD_HEIGHT, mines=DEFAULT_MINE_COUNT, seed=0,
+           positions=0, shard_format=None, shard_boards=DEFAULT_SHARD_BOARDS,
+           workers=None) -> ExportReport:
+    """
+    Writes the positions of the boards seeded seed, seed + 1, ...
+    seed + boards - 1 to shards in directory across a pool of worker
+    processes, then writes the manifest. The format is NPZ when NumPy is
+    installed and RAW otherwise unless one is provided
+    """
+    if shard_format is None:
+        shard_format = NPZ if numpy is not None else RAW
+    if shard_format == NPZ and numpy is None:
+        raise ValueError("the npz format needs NumPy to be installed")
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    seeds = range(seed, seed + boards)
+    chunks = (seeds[start:start + shard_boards]
+              for start in range(0, boards, shard_boards))
+    tasks = ((directory, index, width, height, mines, chunk, positions,
+              shard_format)
+             for index, chunk in enumerate(chunks))
+
+    report = ExportReport(workers=workers)
+    start = time.perf_counter()
+    report.shards.extend(map_in_order(_write_shard, tasks, workers))
+    report.seconds = time.perf_counter() - start
+
+    manifest = {
+        "width": width,
+        "height": height,
+        "mines": mines,
+        "seed": seed,
+        "positions_per_board": positions,
+        "format": shard_format,
+        "boards": report.boards,
+        "positions": report.positions,
+        "dtypes": DTYPES,
+        "shards": report.shards,
+    }
+    with open(os.path.join(directory, MANIFEST), 'w') as output:
+        json.dump(manifest, output, indent=2)
+    return report
+
+
+def read_manifest(directory) -> Dict:
+    """
+    Returns the manifest of the dataset in directory
+    """
+    with open(os.path.join(directory, MANIFEST)) as manifest_file:
+        return json.load(manifest_file)
+
+
+def load_shard(directory, manifest: Dict, shard: Dict) -> Dict:
+    """
+    Returns the arrays of a shard by name. Raw shards are memory mapped so
+    only the parts that are used are read. Needs NumPy
+    """
+    if numpy is None:
+        raise ValueError("loading a shard needs NumPy to be installed")
+    if manifest["format"] == NPZ:
+        with numpy.load(os.path.join(directory, shard["file"])) as arrays:
+            return dict(arrays)
+
+    arrays = {}
+    for array_name, path in shard["files"].items():
+        shape = (shard["positions"],)
+        if array_name in CELL_ARRAYS:
+            shape += (manifest["height"], manifest["width"])
+        arrays[array_name] = numpy.memmap(
+            os.path.join(directory, path), mode='r',
+            dtype=manifest["dtypes"][array_name], shape=shape)
+    return arrays
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("directory", help="where the dataset is written")
+    parser.add_argument("--boards", type=int, default=10000)
+    parser.add_argument("--width", type=int, default=DEFAULT_BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_BOARD_HEIGHT)
+    parser.add_argument("--mines", type=int, default=DEFAULT_MINE_COUNT)
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed of the first board")
+    parser.add_argument("--positions", type=int, default=0,
+                        help="positions sampled from the solver playing "
+                             "each board, 0 writes the boards unplayed")
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="npz when NumPy is installed, raw otherwise")
+    parser.add_argument("--shard-boards", type=int,
+                        default=DEFAULT_SHARD_BOARDS,
+                        help="boards written to each shard")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    try:
+        report = export(args.directory, args.boards, args.width,
+                        args.height, args.mines, args.seed, args.positions,
+                        args.format, args.shard_boards, args.workers)
+    except ValueError as error:
+        print(error)
+        return
+    print(f"Shards: {len(report.shards)} in {args.directory}")
+    print(f"Boards: {report.boards} in {report.seconds:.2f}s "
+          f"({report.boards_per_second:.0f} boards/s on {report.workers} "
+          f"workers)")
+    print(f"Positions: {report.positions} "
+          f"({report.positions_per_second:.0f} positions/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,605 +1,2451 @@
-"""
-A game where the goal is to not step on an exploding square
-"""
-
-# TODO: Get rid of some duplicated code by abstracting it to functions
-# TODO: Update comments and variable names to be have consistent wording
-from dataclasses import dataclass, field
-from enum import Enum
-from typing import List, Set, Tuple
-import random
-
-DEFAULT_BOARD_WIDTH = 9
-DEFAULT_BOARD_HEIGHT = 9
-DEFAULT_MINE_COUNT = 10
-UNCHECKED_SPACE = '▓'
-EMPTY_SPACE = '░'
-MINE = '*'
-FLAG = 'φ'
-
-# The 8 cells adjacent to the current cells starting from the left
-# square then moving clockwise
-adjacent_cells = (
-    (-1, 0),
-    (-1, -1),
-    (0, -1),
-    (1, -1),
-    (1, 0),
-    (1, 1),
-    (0, 1),
-    (-1, 1)
-)
-
-
-class State(Enum):
-    """
-    Contains all of the states for the game
-    """
-    PLAYING = "play"
-    PLAYER_WON = "win"
-    PLAYER_LOST = "lost"
-    PLAYER_QUIT = "quit"
-    NEW_GAME = "new"
-    RESET = "reset"
-    MENU = "menu"
-
-
-@dataclass
-class Cell():
-    """
-    Contains the character located at the cell and a boolean
-    for if the cell has been revealed as well as one for revealed
-    """
-    character: str = field(default=EMPTY_SPACE)
-    revealed: bool = field(default=False)
-    flagged: bool = field(default=False)
-
-
-# custom cells datatype for type hints
-Cells = List[Cell]
-
-
-@dataclass
-class Board():
-    """
-    Contains all of the data relevant to the game board:
-    cells: List of characters representing the board
-    mine_locations: Set of (x, y) tuples for all mine locations
-    width: integer representing board width
-    height: integer representing board height
-    number_of_mines: integer representing the number of mines on the board
-    """
-    cells: Cells = field(init=False, repr=False)
-    mine_locations: Set[Tuple[int, int]] = field(default_factory=set)
-    width: int = field(default=DEFAULT_BOARD_WIDTH)
-    height: int = field(default=DEFAULT_BOARD_HEIGHT)
-    number_of_mines: int = field(default=DEFAULT_MINE_COUNT)
-
-    def __post_init__(self):
-        """
-        Initializes the cells on the board based on the provided witdh, height
-        and mine count
-        """
-
-        # initialize all cells to be empty
-        self.cells = [Cell() for i in range(self.width * self.height)]
-
-        # randomly place mines throughout the board
-        for i in range(self.number_of_mines):
-            x = y = -1
-            while x < 0 or y < 0 or (x, y) in self.mine_locations:
-                x = random.randrange(0, self.width)
-                y = random.randrange(0, self.height)
-            self.mine_locations.add((x, y))
-            self.cells[y*self.width+x].character = MINE
-
-        self.fill_board_with_numbers()
-
-    def fill_board_with_numbers(self):
-        """
-        Marks all cells adjacent to mines with the number of mines
-        adjacent to the cell
-        """
-        x_tuple_position = 0
-        y_tuple_position = 1
-
-        # Loop over all cells with a mine and cells adjacent to each mine
-        for mine_location in self.mine_locations:
-            for position in adjacent_cells:
-                # First calculate the cell position according to the mine
-                adjacent_x_position = mine_location[x_tuple_position] +\
-                    position[x_tuple_position]
-                adjacent_y_position = mine_location[y_tuple_position] +\
-                    position[y_tuple_position]
-
-                # if the adjacent cell falls outside of the bounds of the board
-                # dont do anything with it
-                if adjacent_x_position < 0 or \
-                   adjacent_y_position < 0 or \
-                   adjacent_x_position >= self.width or \
-                   adjacent_y_position >= self.height:
-                    continue
-
-                # get the character at the adjacent position being checked
-                cell = self.get_cell_character(
-                    adjacent_x_position,
-                    adjacent_y_position
-                )
-                # if the character is an EMPTY_SPACE then make it a '1'
-                if cell == EMPTY_SPACE:
-                    cell = '1'
-                # else if the character is a MINE then do move to next square
-                elif cell == MINE:
-                    continue
-                # otherwise increase the number and change the character
-                # to the new number
-                else:
-                    cell = str(int(cell) + 1)
-
-                # update the cells list with the new character
-                self.cells[adjacent_y_position *
-                           self.width+adjacent_x_position].character = cell
-
-    def get_cell_character(self, x, y):
-        """
-        returns the character located at the provided x, y
-        """
-        return self.cells[y*self.width+x].character
-
-    def is_revealed(self, x, y):
-        """
-        returns True if the cell at the provided (x,y) is revealed or false
-        otherwise
-        """
-        return self.cells[y*self.width+x].revealed
-
-    def reveal_cell(self, x, y):
-        """
-        reveals the cell logically so the drawing class can draw the cell
-        """
-        cell = self.cells[y*self.width+x]
-        cell.revealed = True
-        if cell.character == EMPTY_SPACE:
-            self.reveal_surrounding_cells(x, y)
-
-    def reveal_all_mines(self):
-        """
-        reveals all of the mines on the board
-        """
-        for mine_cell in self.mine_locations:
-            self.cells[mine_cell[1]*self.width+mine_cell[0]].revealed = True
-
-    def reveal_surrounding_cells(self, starting_x, starting_y):
-        """
-        Reveals all empty spaces and numbered spaces around an empty space
-        """
-
-        # The list of cells to move to next
-        next_cells = list()
-        # Loop through all cells adjacent to the current cell
-        for adjacent_cell in adjacent_cells:
-            x = starting_x + adjacent_cell[0]
-            y = starting_y + adjacent_cell[1]
-            # if the cell would be off of the board don't do anything with it
-            if x < 0 or y < 0 or x >= self.width or y >= self.height:
-                continue
-
-            cell = self.cells[y*self.width+x]
-            # if the cell is no revealed and it's a blank space
-            # then reveal it and add it to the list to use as the centerpoint
-            if cell.character == EMPTY_SPACE and not cell.revealed:
-                cell.revealed = True
-                next_cells.append((x, y))
-            # otherwise if the cell is not a mine then reveal it and don't
-            # add it to the list of cells to be center points
-            elif cell.character != MINE:
-                cell.revealed = True
-
-            # loop through all revealed empty cells and reveal the cells
-            # around them
-            for cell in next_cells:
-                self.reveal_surrounding_cells(cell[0], cell[1])
-
-    def is_flagged(self, x, y):
-        """
-        Returns True or False depending on if the cell is flagged
-        """
-        return self.cells[y*self.width+x].flagged
-
-    def flag_cell(self, x, y):
-        """
-        Flags the cell logically so that the flag can be drawn and logic
-        can be used to determine if the player has won the game
-        """
-        self.cells[y*self.width+x].flagged = True
-
-    def unflag_cell(self, x, y):
-        """
-        Unlags the cell logically
-        """
-        self.cells[y*self.width+x].flagged = False
-
-    def reset(self):
-        """
-        Resets the current board so that a new game can be played on it
-        """
-        # resetting the board is as simple as resetting all flags to False
-        for cell in self.cells:
-            cell.revealed = False
-            cell.flagged = False
-
-
-@dataclass
-class Display():
-    """
-    Handles displaying the board based on the state of all cells
-    """
-
-    def display_board(self, board: Board, mines_left: int):
-        """
-        Displays the contents of the board based on if the cell is revealed
-        or not
-        """
-        # We don't want to try and work with an empty list
-        if not len(board.cells):
-            return
-
-        # Print the x positions on the board
-        x_pos = '0'
-        print('  ', end='')
-        for i in range(board.width):
-            print(x_pos, end='')
-            if ord(x_pos) < ord('9'):
-                x_pos = str(int(x_pos) + 1)
-            elif ord(x_pos) == ord('9'):
-                x_pos = 'a'
-            else:
-                x_pos = chr(ord(x_pos) + 1)
-        print()
-
-        # Loop through x and y positions then check each cell
-        # at the positions to see if they are revealed or not
-        # if they are then print the cell otherwise print the
-        # not revealed character
-        y_pos = '0'
-        for y in range(board.height):
-            # print the y positions of the board
-            print(f"{y_pos} ", end='')
-            for x in range(board.width):
-                cell = board.cells[y*board.width+x]
-                if cell.revealed:
-                    print(cell.character, end='')
-                elif cell.flagged:
-                    print(FLAG, end='')
-                else:
-                    print(UNCHECKED_SPACE, end='')
-
-            if ord(y_pos) < ord('9'):
-                y_pos = str(int(y_pos) + 1)
-            elif ord(y_pos) == ord('9'):
-                y_pos = 'a'
-            else:
-                y_pos = chr(ord(y_pos) + 1)
-            print()
-        print(f"Mines left: {mines_left}")
-
-    def debug_display(self, board: Cells, board_width, board_height):
-        """
-        Displays the contents of all cells on the board.
-        """
-        # We don't want to try and work with an empty list
-        if not len(board):
-            return
-
-        # Loop through x and y positions then check each cell
-        # at the positions to see if they are revealed or not
-        # if they are then print the cell otherwise print the
-        # not revealed character
-        for y in range(board_height):
-            for x in range(board_width):
-                cell = board[y*board_width+x]
-                print(cell.character, end='')
-            print()
-
-
-@dataclass
-class Controller():
-    """
-    Controls all logic of the game from updating the board
-    to notifying the display class to draw the game
-    """
-
-    class Commands(Enum):
-        REVEAL = "reveal"
-        FLAG = "flag"
-        UNFLAG = "unflag"
-        NEW = "new"
-        RESET = "reset"
-        QUIT = "quit"
-
-    display: Display = field(default_factory=Display)
-    board: Board = field(default_factory=Board)
-    current_state: State = field(default=State.MENU)
-    mode: Commands = field(default=Commands.REVEAL)
-    mines_left: int = field(init=False, repr=False)
-    flagged_locations: Set[Tuple[int, int]] = field(default_factory=set)
-
-    def __post_init__(self):
-        """
-        Builds the state machine
-        """
-        self.states = {
-            State.MENU.value: self.process_menu,
-            State.NEW_GAME.value: self.process_new_game,
-            State.RESET.value: self.reset_game,
-            State.PLAYING.value: self.process_playing,
-            State.PLAYER_WON.value: self.process_win,
-            State.PLAYER_LOST.value: self.process_loss,
-            State.PLAYER_QUIT.value: self.process_quit,
-        }
-
-    def build_new_game(self, width, height, num_mines):
-        """
-        initializes and returns True with the provided parameters
-        if they are in the correct range otherwise prints an error message
-        and returns False
-        """
-        MIN_BOARD_WIDTH = 9
-        MAX_BOARD_WIDTH = 30
-        MIN_BOARD_HEIGHT = 9
-        MAX_BOARD_HEIGHT = 24
-        MIN_MINE_COUNT = 10
-        MAX_MINE_COUNT = 668
-        MIN_MINE_COUNT = 10
-        MAX_MINE_COUNT = (width - 1) * (height - 1)
-
-        # Create the board if all provided parameters fall within the min and
-        # max thresholds. Otherwise print the thresholds and don't create the
-        # board
-        if width >= MIN_BOARD_WIDTH and width <= MAX_BOARD_WIDTH and\
-                height >= MIN_BOARD_HEIGHT and height <= MAX_BOARD_HEIGHT and\
-                num_mines >= MIN_MINE_COUNT and num_mines <= MAX_MINE_COUNT\
-                and num_mines >= MIN_MINE_COUNT and\
-                num_mines <= MAX_MINE_COUNT:
-
-            self.board = Board(
-                width=width,
-                height=height,
-                number_of_mines=num_mines
-            )
-            self.mines_left = num_mines
-            print("New Game!\n")
-            self.current_state = State.PLAYING
-        else:
-            print(f"Invalid board setup: {width}x{height} {num_mines}")
-            print(f"Height range: {MIN_BOARD_HEIGHT}-{MAX_BOARD_HEIGHT}")
-            print(f"Width range: {MIN_BOARD_WIDTH}-{MAX_BOARD_WIDTH}")
-            print(f"Mine range for board size: {MIN_MINE_COUNT}-{MAX_MINE_COUNT}")  # noqa: E501
-            self.board = None
-
-    def reset_game(self):
-        """
-        Resets the game to be retried
-        """
-        self.board.reset()
-        self.mines_left = self.board.number_of_mines
-        self.flagged_locations = set()
-        self.current_state = State.PLAYING
-
-    def convert_move_to_xy(self, move: str):
-        """
-        Converts the user move from str to (x, y) tuple of ints
-        """
-        move = [char for char in move]
-        col = move[0]
-        row = move[1]
-        x = -1
-        y = -1
-
-        # if the unicode for the entered column is less than
-        # the unicode for the character '9' then set x to the
-        # integer representation of column
-        if ord(col) >= ord('0') and ord(col) <= ord('9'):
-            x = int(col)
-
-        # the character is set to 10 + the difference between the unicode
-        # for the entered character minus the unicode for the character 'a'
-        # example: col = 'c', ord(col) = 99, ord('a') = 97
-        # 99 - 97 = 2 + 10 = 12 for column 12
-        # really column 13 since counting starts from 0
-        else:
-            x = int(ord(col) - ord('a') + 10)
-
-        # Same thing as before for the row
-        if ord(row) >= ord('0') and ord(row) <= ord('9'):
-            y = int(row)
-        else:
-            y = int(ord(row) - ord('a') + 10)
-
-        return (x, y)
-
-    def check_win(self):
-        """
-        Returns True if all mines are flagged and false otherwise
-        """
-        flagged_mines = self.flagged_locations.intersection(
-            self.board.mine_locations
-        )
-        if len(flagged_mines) == len(self.board.mine_locations):
-            return True
-        else:
-            return False
-
-    def get_command(self):
-        """
-        Gets the players command and returns it
-        """
-        print("Commands - reveal, flag, unflag, new, reset, quit")
-        command = input("Enter a command (default is reveal): ")
-        if not command:
-            return self.Commands.REVEAL.value
-        else:
-            return command
-
-    def get_move(self):
-        """
-        Gets the move from player
-        """
-        while True:
-            move = input("Enter col and row: ")
-            if move:
-                return move
-
-    def validate_input_length(self, move: str):
-        """
-        Validates that user input is correct length
-        """
-        return True if len(move) == 2 else False
-
-    def process_command(self, command: str):
-        """
-        Processes user commands
-        """
-        command = command.lower()
-        if (command == self.Commands.REVEAL.value or
-                command == self.Commands.FLAG.value or
-                command == self.Commands.UNFLAG.value):
-            self.mode = command
-            move = self.get_move()
-            if self.validate_input_length(move):
-                move_position = self.convert_move_to_xy(move)
-                if (move_position[0] >= 0 and
-                        move_position[0] < self.board.width and
-                        move_position[1] >= 0 and
-                        move_position[1] < self.board.height):
-                    self.process_move(move_position[0], move_position[1])
-        elif command == self.Commands.NEW.value:
-            self.current_state = State.NEW_GAME
-        elif command == self.Commands.RESET.value:
-            self.current_state = State.RESET
-        elif command == self.Commands.QUIT.value:
-            self.current_state = State.PLAYER_QUIT
-
-    def process_move(self, x, y):
-        """
-        processes the player's move
-        """
-        if self.mode == self.Commands.REVEAL.value:
-            # Don't let the player reveal a cell that is already revealed
-            if self.board.is_revealed(x, y):
-                print(f"Invalid Move: Cell ({x}, {y}) is already revealed")
-            elif self.board.is_flagged(x, y):
-                print(f"Invalid Move: Cell ({x}, {y}) is already flagged")
-            # otherwise if the cell is a mine then reveal all mines and set
-            # game state to lost
-            elif self.board.get_cell_character(x, y) == MINE:
-                self.board.reveal_all_mines()
-                self.current_state = State.PLAYER_LOST
-            # otherwise reveal the cell and potentially other cells around it
-            else:
-                self.board.reveal_cell(x, y)
-        elif self.mode == self.Commands.FLAG.value:
-            if self.board.is_revealed(x, y):
-                print(f"Invalid Move: Cell ({x}, {y}) is already revealed")
-            elif self.board.is_flagged(x, y):
-                print(f"Invalid Move: Cell ({x}, {y}) is already flagged")
-            else:
-                self.board.flag_cell(x, y)
-                self.flagged_locations.add((x, y))
-                self.mines_left -= 1
-                if self.check_win():
-                    self.current_state = State.PLAYER_WON
-        elif self.mode == self.Commands.UNFLAG.value:
-            if self.board.is_revealed(x, y):
-                print(f"Invalid Move: Cell ({x}, {y}) is already revealed")
-            elif self.board.is_flagged(x, y):
-                self.board.unflag_cell(x, y)
-                self.mines_left += 1
-
-    def run(self):
-        """
-        Runs the state machine
-        """
-        while True:
-            self.states[self.current_state.value]()
-            if self.current_state == State.PLAYER_QUIT:
-                self.process_quit()
-                break
-
-    def process_playing(self):
-        """
-        Handles playing the game from getting input to displaying the board
-        """
-        self.display.display_board(self.board, self.mines_left)
-        command = self.get_command()
-        self.process_command(command)
-
-    def process_new_game(self):
-        """
-        Handles prompting player for new game parameters and calling
-        build_new_game function
-        """
-        game_built = False
-        while not game_built:
-            print("Please enter the parameters for your new game board")
-            print("Default width: 9")
-            print("Default height: 9")
-            print("Default mine count: 10")
-            try:
-                width = int(input("Board width: "))
-                height = int(input("Board height: "))
-                num_mines = int(input("Number of mines: "))
-                self.build_new_game(width, height, num_mines)
-                if self.board is not None:
-                    game_built = True
-            except ValueError:
-                print("Starting game with default parameters")
-                width = DEFAULT_BOARD_WIDTH
-                height = DEFAULT_BOARD_HEIGHT
-                num_mines = DEFAULT_MINE_COUNT
-            finally:
-                self.build_new_game(width, height, num_mines)
-                if self.board is not None:
-                    game_built = True
-        self.current_state == State.PLAYING
-
-    def process_win(self):
-        """
-        Handles player winning the game
-        """
-        self.display.display_board(self.board, self.mines_left)
-        print("You Won!")
-        self.current_state = State.MENU
-
-    def process_loss(self):
-        """
-        Handles player losing the game
-        """
-        self.board.reveal_all_mines()
-        self.display.display_board(self.board, self.mines_left)
-        print("You Loss!")
-        self.current_state = State.MENU
-
-    def process_menu(self):
-        """
-        Handles all menu stuff for player
-        """
-        print("Start a new game or quit?")
-        while self.current_state == State.MENU:
-            command = input("Enter command (new, quit): ")
-            if command == self.Commands.NEW.value or not command:
-                self.current_state = State.NEW_GAME
-            elif command == self.Commands.QUIT.value:
-                self.current_state = State.PLAYER_QUIT
-
-    def process_quit(self):
-        """
-        Handles player quiting the game
-        """
-        print("Thanks for playing!")
-        pass
-
-
-if __name__ == "__main__":
-    game = Controller()
-    game.run()
+"""
+A game where the goal is to not step on an exploding square
+"""
+
+# TODO: Get rid of some duplicated code by abstracting it to functions
+# TODO: Update comments and variable names to be have consistent wording
+from array import array
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from enum import Enum
+from functools import lru_cache
+from typing import (Deque, Dict, Iterable, List, Optional, Sequence, Set,
+                    TextIO, Tuple)
+import argparse
+import io
+import os
+import random
+import shutil
+import sys
+
+# NumPy is optional, when it is installed it is used to compute the
+# numbers on the board in bulk
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+DEFAULT_BOARD_WIDTH = 9
+DEFAULT_BOARD_HEIGHT = 9
+DEFAULT_MINE_COUNT = 10
+MIN_BOARD_WIDTH = 9
+MAX_BOARD_WIDTH = 30
+MIN_BOARD_HEIGHT = 9
+MAX_BOARD_HEIGHT = 24
+MIN_MINE_COUNT = 10
+UNCHECKED_SPACE = '▓'
+EMPTY_SPACE = '░'
+MINE = '*'
+FLAG = 'φ'
+
+# Value stored in Board.counts for a cell containing a mine. Every other
+# cell stores the number of mines adjacent to it (0-8)
+MINE_VALUE = 9
+# The character drawn for each value that can be stored in Board.counts
+CELL_CHARACTERS = (EMPTY_SPACE, '1', '2', '3', '4', '5', '6', '7', '8', MINE)
+
+# Bits stored in Board.states for each cell
+REVEALED = 1
+FLAGGED = 2
+# Every combination of the state bits. Board.states holds each cell's bits
+# plus Board.generation_base, and resetting the board moves the base up by
+# this much so all of the older values read as hidden and unflagged
+STATES_PER_GENERATION = 4
+
+# Rules for winning a game. WIN_BY_FLAGS is won once every mine is flagged
+# without any wrong flags, WIN_BY_REVEALING once every cell without a mine
+# is revealed and WIN_BY_EITHER by whichever happens first
+WIN_BY_FLAGS = "flags"
+WIN_BY_REVEALING = "reveal"
+WIN_BY_EITHER = "either"
+WIN_RULES = (WIN_BY_FLAGS, WIN_BY_REVEALING, WIN_BY_EITHER)
+
+# Seconds spent looking for a no-guess board before a normal one is played,
+# dense boards hardly ever or never have one
+NO_GUESS_TIME_LIMIT = 10
+# Random cells tried for every mine moved off the first click before the
+# free cells are listed, which only happens on nearly full boards
+FIRST_CLICK_TRIES = 32
+
+# The 8 cells adjacent to the current cells starting from the left
+# square then moving clockwise
+adjacent_cells = (
+    (-1, 0),
+    (-1, -1),
+    (0, -1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+    (0, 1),
+    (-1, 1)
+)
+
+
+def max_mine_count(width, height):
+    """
+    Returns the most mines allowed on a board of the provided size
+    """
+    return (width - 1) * (height - 1)
+
+
+def is_valid_board_setup(width, height, num_mines):
+    """
+    Returns True if a game can be started with the provided board size and
+    number of mines
+    """
+    return (MIN_BOARD_WIDTH <= width <= MAX_BOARD_WIDTH and
+            MIN_BOARD_HEIGHT <= height <= MAX_BOARD_HEIGHT and
+            MIN_MINE_COUNT <= num_mines <= max_mine_count(width, height))
+
+
+# Boards with up to this many cells keep a tuple of neighbours for every
+# cell, which is the quickest to index but costs around 130 bytes per cell
+NEIGHBOUR_TUPLE_LIMIT = 1 << 14
+# Boards with more cells than this work out neighbours when they're asked
+# for instead of keeping a NeighbourTable, which costs around 33 bytes per
+# cell
+NEIGHBOUR_TABLE_LIMIT = 1 << 18
+# Slots kept for every cell of a NeighbourTable, the most neighbours a cell
+# can have
+NEIGHBOUR_SLOTS = 8
+
+
+class NeighbourTable():
+    """
+    The indices of the cells adjacent to every cell of a board, kept in one
+    flat array with NEIGHBOUR_SLOTS slots per cell padded with -1 along
+    with the number of neighbours of each cell. Indexing the table with a
+    cell index returns the neighbours of that cell
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = array('i', [-1]) * (width * height * NEIGHBOUR_SLOTS)
+        self.sizes = bytearray(width * height)
+        cells = self.cells
+        for y in range(height):
+            for x in range(width):
+                index = y * width + x
+                slot = index * NEIGHBOUR_SLOTS
+                for x_offset, y_offset in adjacent_cells:
+                    if 0 <= x + x_offset < width and \
+                            0 <= y + y_offset < height:
+                        cells[slot] = index + y_offset * width + x_offset
+                        slot += 1
+                self.sizes[index] = slot - index * NEIGHBOUR_SLOTS
+
+    def __getitem__(self, index):
+        start = index * NEIGHBOUR_SLOTS
+        return self.cells[start:start + self.sizes[index]]
+
+    def __len__(self):
+        return len(self.sizes)
+
+
+@dataclass(frozen=True)
+class NeighbourLookup():
+    """
+    Works out the indices of the cells adjacent to a cell when indexed, in
+    place of a neighbour table for boards too large to keep one
+    """
+    width: int
+    height: int
+
+    def __getitem__(self, index):
+        width = self.width
+        center_x = index % width
+        center_y = index // width
+        # cells away from the edges have all 8 neighbours
+        if 0 < center_x < width - 1 and 0 < center_y < self.height - 1:
+            return (index - 1, index - width - 1, index - width,
+                    index - width + 1, index + 1, index + width + 1,
+                    index + width, index + width - 1)
+        return tuple(
+            (center_y + y_offset) * self.width + center_x + x_offset
+            for x_offset, y_offset in adjacent_cells
+            if 0 <= center_x + x_offset < self.width and
+            0 <= center_y + y_offset < self.height
+        )
+
+
+@lru_cache(maxsize=4)
+def neighbour_table(width, height):
+    """
+    Returns the indices of the cells adjacent to every cell of a board of
+    the provided size, indexed by cell index. Boards over
+    NEIGHBOUR_TUPLE_LIMIT cells get a NeighbourTable and boards over
+    NEIGHBOUR_TABLE_LIMIT cells a NeighbourLookup instead. Tables are
+    shared by every board of the same size
+    """
+    if width * height > NEIGHBOUR_TABLE_LIMIT:
+        return NeighbourLookup(width, height)
+    if width * height > NEIGHBOUR_TUPLE_LIMIT:
+        return NeighbourTable(width, height)
+
+    # every tuple refers to the same int objects to keep the table small
+    indices = list(range(width * height))
+    table = []
+    for y in range(height):
+        for x in range(width):
+            table.append(tuple(
+                indices[(y + y_offset) * width + x + x_offset]
+                for x_offset, y_offset in adjacent_cells
+                if 0 <= x + x_offset < width and 0 <= y + y_offset < height
+            ))
+    return tuple(table)
+
+
+# Columns and rows from here on have no single character label, 0-9 and a-z
+MAX_LABEL = 36
+
+
+def position_label(position):
+    """
+    Returns the character used to label a column or row on the board,
+    0-9 followed by a, b, c...
+    """
+    return str(position) if position < 10 else chr(ord('a') + position - 10)
+
+
+class State(Enum):
+    """
+    Contains all of the states for the game
+    """
+    PLAYING = "play"
+    PLAYER_WON = "win"
+    PLAYER_LOST = "lost"
+    PLAYER_QUIT = "quit"
+    NEW_GAME = "new"
+    RESET = "reset"
+    MENU = "menu"
+
+
+class Commands(Enum):
+    """
+    Contains all of the commands the player can enter. REVEAL, FLAG,
+    UNFLAG and CHORD are the moves a Game applies
+    """
+    REVEAL = "reveal"
+    FLAG = "flag"
+    UNFLAG = "unflag"
+    NEW = "new"
+    RESET = "reset"
+    QUIT = "quit"
+    HINT = "hint"
+    PROBABILITY = "probability"
+    SAVE = "save"
+    LOAD = "load"
+    UNDO = "undo"
+    REDO = "redo"
+    CHORD = "chord"
+
+
+# Translation tables between the bytes of a board, one per cell, and the
+# binary digits of a mask
+ZERO_DIGITS = bytes.maketrans(bytes(range(MINE_VALUE + 1)), b'1000000000')
+MINE_DIGITS = bytes.maketrans(bytes(range(MINE_VALUE + 1)), b'0000000001')
+REVEALED_DIGITS = bytes.maketrans(bytes(range(STATES_PER_GENERATION)),
+                                  b'0101')
+FLAGGED_DIGITS = bytes.maketrans(bytes(range(STATES_PER_GENERATION)),
+                                 b'0011')
+DIGIT_BYTES = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def mask_from_digits(digits: bytes):
+    """
+    Returns the mask with bit i set where digits[i] is b'1'
+    """
+    return int(digits[::-1] or b'0', 2)
+
+
+def spread_mask(mask, size):
+    """
+    Returns an int holding one byte for each of the first size bits of
+    mask, so two masks can be added together a byte per cell
+    """
+    return int.from_bytes(
+        format(mask, f'0{size}b').encode().translate(DIGIT_BYTES), 'big'
+    )
+
+
+def mask_indices(mask):
+    """
+    Returns the list of the indices of the bits set in mask
+    """
+    digits = format(mask, 'b')[::-1]
+    indices = []
+    index = digits.find('1')
+    while index >= 0:
+        indices.append(index)
+        index = digits.find('1', index + 1)
+    return indices
+
+
+@lru_cache(maxsize=8)
+def edge_masks(width, height):
+    """
+    Returns the mask of every cell on a board of the provided size along
+    with masks of every cell except the ones in the first column and every
+    cell except the ones in the last column
+    """
+    full = (1 << (width * height)) - 1
+    first_column = int(('0' * (width - 1) + '1') * height, 2)
+    last_column = int(('1' + '0' * (width - 1)) * height, 2)
+    return full, full & ~first_column, full & ~last_column
+
+
+@dataclass
+class Board():
+    """
+    Contains all of the data relevant to the game board:
+    counts: bytearray holding the number of mines adjacent to each cell
+        or MINE_VALUE for cells that contain a mine
+    states: array of unsigned ints holding the REVEALED and FLAGGED bits of
+        each cell stamped with the generation they were set in. Use
+        cell_state() and cell_states() to read them
+    generation_base: the value states are stamped above in the current
+        generation, values below it were set before the last reset
+    mine_locations: Set of (x, y) tuples for all mine locations, when
+        provided the mines are placed there instead of at random
+    width: integer representing board width
+    height: integer representing board height
+    number_of_mines: integer representing the number of mines on the board
+    seed: integer the mine layout is generated from, a random one is picked
+        when it isn't provided so every board can be rebuilt from its seed
+    rng: random.Random seeded with seed and used for all board randomness
+    neighbours: the neighbour_table() for the size of the board
+    flagged_mines: number of mines that are flagged
+    wrong_flags: number of flagged cells without a mine
+    hidden_safe_cells: number of cells without a mine not revealed yet
+    first_click_cleared: True once clear_first_click() has moved the mines
+        away from the first cell revealed
+    The three counters are kept up to date by every method that changes
+    the board so a win can be checked without looking at the cells
+    """
+    counts: bytearray = field(init=False, repr=False)
+    states: array = field(init=False, repr=False)
+    generation_base: int = field(default=0, init=False, repr=False)
+    mine_locations: Set[Tuple[int, int]] = field(default_factory=set)
+    width: int = field(default=DEFAULT_BOARD_WIDTH)
+    height: int = field(default=DEFAULT_BOARD_HEIGHT)
+    number_of_mines: int = field(default=DEFAULT_MINE_COUNT)
+    seed: Optional[int] = field(default=None)
+    rng: random.Random = field(init=False, repr=False, compare=False)
+    neighbours: Sequence[Sequence[int]] = field(init=False, repr=False,
+                                                compare=False)
+    flagged_mines: int = field(default=0, init=False, repr=False)
+    wrong_flags: int = field(default=0, init=False, repr=False)
+    hidden_safe_cells: int = field(default=0, init=False, repr=False)
+    first_click_cleared: bool = field(default=False, init=False, repr=False)
+
+    def __post_init__(self):
+        """
+        Initializes the cells on the board based on the provided witdh, height
+        and mine count
+        """
+
+        # initialize all cells to be empty and hidden
+        self.counts = bytearray(self.width * self.height)
+        self.neighbours = neighbour_table(self.width, self.height)
+
+        if self.seed is None:
+            self.seed = random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+
+        # place mines by sampling cell indices without replacement so the
+        # cost doesn't depend on how crowded the board is
+        if self.mine_locations:
+            self.number_of_mines = len(self.mine_locations)
+        else:
+            for index in self.rng.sample(range(self.width * self.height),
+                                         self.number_of_mines):
+                self.mine_locations.add((index % self.width,
+                                         index // self.width))
+
+        self.clear_states()
+        self.fill_board_with_numbers()
+
+    def clear_states(self):
+        """
+        Sets every cell to hidden and unflagged
+        """
+        self.states = array('I', [0]) * (self.width * self.height)
+        self.generation_base = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Sets the counters to match a board with every cell hidden and
+        unflagged
+        """
+        self.flagged_mines = 0
+        self.wrong_flags = 0
+        self.hidden_safe_cells = self.width * self.height - \
+            len(self.mine_locations)
+
+    def recount(self):
+        """
+        Works the counters out again from every cell, for when the states
+        were changed without going through the methods that keep them
+        """
+        states = self.cell_states()
+        mines = [y*self.width+x for x, y in self.mine_locations]
+        self.flagged_mines = sum(1 for index in mines
+                                 if states[index] & FLAGGED)
+        self.wrong_flags = states.count(FLAGGED) + \
+            states.count(REVEALED | FLAGGED) - self.flagged_mines
+        revealed_mines = sum(1 for index in mines
+                             if states[index] & REVEALED)
+        self.hidden_safe_cells = len(states) - len(mines) - \
+            (states.count(REVEALED) + states.count(REVEALED | FLAGGED) -
+             revealed_mines)
+
+    def fill_board_with_numbers(self):
+        """
+        Recomputes the counts of every cell from mine_locations. Mines are
+        marked with MINE_VALUE and all other cells with the number of mines
+        adjacent to the cell
+        """
+        if numpy is not None:
+            self._fill_board_with_numbers_numpy()
+            return
+
+        counts = self.counts
+        neighbours = self.neighbours
+        counts[:] = bytes(len(counts))
+        mines = [y*self.width+x for x, y in self.mine_locations]
+        for mine in mines:
+            counts[mine] = MINE_VALUE
+
+        # Loop over all cells with a mine and cells adjacent to each mine
+        for mine in mines:
+            for index in neighbours[mine]:
+                # mines don't get a number, every other cell counts up by one
+                if counts[index] != MINE_VALUE:
+                    counts[index] += 1
+
+    def _fill_board_with_numbers_numpy(self):
+        """
+        Computes the counts of every cell at once by summing the eight
+        shifted copies of a zero padded mine mask
+        """
+        # the mask has a border of empty cells so the shifted views never
+        # fall off of the board
+        mines = numpy.zeros((self.height + 2, self.width + 2), numpy.uint8)
+        if self.mine_locations:
+            xs, ys = zip(*self.mine_locations)
+            mines[numpy.array(ys) + 1, numpy.array(xs) + 1] = 1
+
+        counts = numpy.zeros((self.height, self.width), numpy.uint8)
+        for x_offset, y_offset in adjacent_cells:
+            counts += mines[1 + y_offset:1 + y_offset + self.height,
+                            1 + x_offset:1 + x_offset + self.width]
+        counts[mines[1:-1, 1:-1] == 1] = MINE_VALUE
+
+        # write straight into the board's bytearray without copying it
+        numpy.frombuffer(self.counts, numpy.uint8)[:] = counts.ravel()
+
+    def get_cell_character(self, x, y):
+        """
+        returns the character located at the provided x, y
+        """
+        return CELL_CHARACTERS[self.counts[y*self.width+x]]
+
+    def is_mine(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) contains a mine
+        """
+        return self.counts[y*self.width+x] == MINE_VALUE
+
+    def cell_state(self, index):
+        """
+        returns the REVEALED and FLAGGED bits of the cell at the provided
+        index
+        """
+        state = self.states[index] - self.generation_base
+        return state if state > 0 else 0
+
+    def set_cell_state(self, index, state):
+        """
+        sets the REVEALED and FLAGGED bits of the cell at the provided index
+        """
+        self.states[index] = self.generation_base + state
+
+    def cell_states(self):
+        """
+        returns a bytearray of the REVEALED and FLAGGED bits of every cell
+        """
+        base = self.generation_base
+        if numpy is not None:
+            states = numpy.frombuffer(self.states,
+                                      f'u{self.states.itemsize}')
+            return bytearray(
+                numpy.where(states > base, states - base, 0).astype(
+                    numpy.uint8)
+            )
+        if not base:
+            # nothing is stamped below the base before the first reset
+            return bytearray(self.states.tolist())
+        return bytearray(state - base if state > base else 0
+                         for state in self.states)
+
+    def masks(self):
+        """
+        Returns the mine, revealed and flagged cells as integer masks with
+        bit y*width+x for the cell at (x, y)
+        """
+        states = self.cell_states()
+        return (mask_from_digits(self.counts.translate(MINE_DIGITS)),
+                mask_from_digits(states.translate(REVEALED_DIGITS)),
+                mask_from_digits(states.translate(FLAGGED_DIGITS)))
+
+    def load_masks(self, revealed_mask, flagged_mask):
+        """
+        Sets the revealed and flagged cells from integer masks like the
+        ones returned by masks()
+        """
+        size = self.width * self.height
+        self.clear_states()
+        states = spread_mask(revealed_mask, size) + \
+            2 * spread_mask(flagged_mask, size)
+        self.states = array('I')
+        self.states.extend(states.to_bytes(size, 'little'))
+        self.recount()
+
+    def is_revealed(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) is revealed or false
+        otherwise
+        """
+        return bool(self.cell_state(y*self.width+x) & REVEALED)
+
+    def reveal_cell(self, x, y):
+        """
+        reveals the cell logically so the drawing class can draw the cell
+        and returns the set of (x, y) positions that were newly revealed
+        """
+        index = y*self.width+x
+        state = self.cell_state(index)
+        if state & REVEALED:
+            return set()
+
+        self.set_cell_state(index, state | REVEALED)
+        if self.counts[index] != MINE_VALUE:
+            self.hidden_safe_cells -= 1
+        revealed = {(x, y)}
+        if self.counts[index] == 0:
+            revealed |= self.reveal_surrounding_cells(x, y)
+        return revealed
+
+    def reveal_cells(self, positions: Iterable[Tuple[int, int]]):
+        """
+        Reveals the cells at the provided (x, y) positions together, with
+        one fill spreading out from all of the empty ones at once, and
+        returns the set of (x, y) positions that were newly revealed
+        """
+        width = self.width
+        revealed = set()
+        empty = []
+        for x, y in positions:
+            index = y*width+x
+            state = self.cell_state(index)
+            if state & REVEALED:
+                continue
+            self.set_cell_state(index, state | REVEALED)
+            if self.counts[index] != MINE_VALUE:
+                self.hidden_safe_cells -= 1
+            revealed.add((x, y))
+            if self.counts[index] == 0:
+                empty.append(index)
+        if empty:
+            revealed |= self.reveal_around(empty)
+        return revealed
+
+    def chord_cells(self, x, y):
+        """
+        Returns the (x, y) positions a chord on the cell reveals, the
+        hidden cells around a revealed number that has as many flags around
+        it as its count, or an empty list if the number isn't satisfied
+        """
+        index = y*self.width+x
+        count = self.counts[index]
+        if not self.cell_state(index) & REVEALED or count == MINE_VALUE:
+            return []
+        flags = 0
+        hidden = []
+        for neighbour in self.neighbours[index]:
+            state = self.cell_state(neighbour)
+            if state & FLAGGED:
+                flags += 1
+            elif not state & REVEALED:
+                hidden.append(neighbour)
+        if flags != count:
+            return []
+        return [(neighbour % self.width, neighbour // self.width)
+                for neighbour in hidden]
+
+    def reveal_all_mines(self):
+        """
+        reveals all of the mines on the board
+        """
+        for mine_cell in self.mine_locations:
+            index = mine_cell[1]*self.width+mine_cell[0]
+            self.set_cell_state(index, self.cell_state(index) | REVEALED)
+
+    def hidden_mines(self):
+        """
+        returns the indices of the mines that aren't revealed
+        """
+        return [y*self.width+x for x, y in self.mine_locations
+                if not self.cell_state(y*self.width+x) & REVEALED]
+
+    def show_cells(self, indices: Sequence[int]):
+        """
+        Reveals the cells at the provided indices without revealing any
+        cells around them, for replaying a reveal that was recorded
+        """
+        for index in indices:
+            state = self.cell_state(index)
+            if not state & REVEALED:
+                self.set_cell_state(index, state | REVEALED)
+                if self.counts[index] != MINE_VALUE:
+                    self.hidden_safe_cells -= 1
+
+    def hide_cells(self, indices: Sequence[int]):
+        """
+        Hides the revealed cells at the provided indices again, for taking
+        back a reveal
+        """
+        for index in indices:
+            state = self.cell_state(index)
+            if state & REVEALED:
+                self.set_cell_state(index, state & ~REVEALED)
+                if self.counts[index] != MINE_VALUE:
+                    self.hidden_safe_cells += 1
+
+    def reveal_surrounding_cells(self, starting_x, starting_y):
+        """
+        Reveals all empty spaces and numbered spaces around an empty space
+        and returns the set of (x, y) positions that were newly revealed
+        """
+        return self.reveal_around([starting_y*self.width+starting_x])
+
+    def reveal_around(self, indices: List[int]):
+        """
+        Reveals all empty spaces and numbered spaces around the empty
+        spaces at the provided indices and returns the set of (x, y)
+        positions that were newly revealed
+        """
+        counts = self.counts
+        states = self.states
+        neighbours = self.neighbours
+        base = self.generation_base
+        revealed = []
+
+        # The empty cells whose neighbours still need to be revealed. A cell
+        # is only added once, when it is revealed, so every cell on the board
+        # is visited at most once no matter how large the empty region is
+        next_cells = list(indices)
+        while next_cells:
+            # Loop through all cells adjacent to the current cell
+            for index in neighbours[next_cells.pop()]:
+                count = counts[index]
+                state = states[index] - base
+                if state < 0:
+                    state = 0
+                # already revealed cells, flagged cells and mines are left
+                # alone, so a wrong flag stays up for the player to take
+                # off and is never revealed while still counted as a flag
+                if state or count == MINE_VALUE:
+                    continue
+
+                states[index] = base + (state | REVEALED)
+                revealed.append(index)
+                # blank spaces become the centerpoint for more reveals
+                if count == 0:
+                    next_cells.append(index)
+
+        # mines are never revealed by the fill so every cell is a safe one
+        self.hidden_safe_cells -= len(revealed)
+        width = self.width
+        return {(index % width, index // width) for index in revealed}
+
+    def is_flagged(self, x, y):
+        """
+        Returns True or False depending on if the cell is flagged
+        """
+        return bool(self.cell_state(y*self.width+x) & FLAGGED)
+
+    def is_untouched(self):
+        """
+        Returns True if no cell without a mine has been revealed yet
+        """
+        return self.hidden_safe_cells == \
+            self.width * self.height - len(self.mine_locations)
+
+    def move_mine(self, source, target):
+        """
+        Moves the mine at index source to the cell without a mine at index
+        target. Only the counts around the two cells are updated
+        """
+        counts = self.counts
+        neighbours = self.neighbours
+        width = self.width
+        # flags stay where they are but may change from right to wrong
+        flagged = [index for index in (source, target)
+                   if self.cell_state(index) & FLAGGED]
+        for index in flagged:
+            self.count_flag(index, -1)
+
+        self.mine_locations.discard((source % width, source // width))
+        self.mine_locations.add((target % width, target // width))
+        # the target is placed first so it is counted as a mine when the
+        # source works out its own count
+        counts[target] = MINE_VALUE
+        for index in neighbours[target]:
+            if counts[index] != MINE_VALUE:
+                counts[index] += 1
+        count = 0
+        for index in neighbours[source]:
+            if counts[index] == MINE_VALUE:
+                count += 1
+            else:
+                counts[index] -= 1
+        counts[source] = count
+
+        for index in flagged:
+            self.count_flag(index, 1)
+
+    def clear_first_click(self, x, y):
+        """
+        Moves every mine in the 3x3 area around (x, y) to a random cell
+        outside of it so the first cell revealed opens up the board. Only
+        as many mines are moved as there are free cells to take them
+        """
+        width = self.width
+        area = {(y + y_offset)*width + x + x_offset
+                for x_offset, y_offset in adjacent_cells + ((0, 0),)
+                if 0 <= x + x_offset < width and
+                0 <= y + y_offset < self.height}
+        counts = self.counts
+        mines = [index for index in area if counts[index] == MINE_VALUE]
+        if mines:
+            size = width * self.height
+            free = size - len(self.mine_locations) - len(area) + len(mines)
+            moves = min(len(mines), free)
+            # random cells are tried first so large boards are never
+            # scanned, the free cells are only listed when the tries run
+            # out on a nearly full board
+            targets: List[int] = []
+            tries = moves * FIRST_CLICK_TRIES
+            while len(targets) < moves and tries:
+                tries -= 1
+                target = self.rng.randrange(size)
+                if (counts[target] != MINE_VALUE and target not in area and
+                        target not in targets):
+                    targets.append(target)
+            if len(targets) < moves:
+                rest = [index for index in range(size)
+                        if counts[index] != MINE_VALUE and
+                        index not in area and index not in targets]
+                targets += self.rng.sample(rest, moves - len(targets))
+            for source, target in zip(mines, targets):
+                self.move_mine(source, target)
+        self.first_click_cleared = True
+
+    def all_mines_flagged(self):
+        """
+        Returns True if every mine on the board is flagged
+        """
+        return self.flagged_mines == len(self.mine_locations)
+
+    def all_safe_cells_revealed(self):
+        """
+        Returns True if every cell without a mine is revealed
+        """
+        return self.hidden_safe_cells == 0
+
+    def is_won(self, rule=WIN_BY_EITHER):
+        """
+        Returns True if the board is won under the provided win rule
+        """
+        flags_won = self.all_mines_flagged() and not self.wrong_flags
+        if rule == WIN_BY_FLAGS:
+            return flags_won
+        if rule == WIN_BY_REVEALING:
+            return self.all_safe_cells_revealed()
+        return flags_won or self.all_safe_cells_revealed()
+
+    def count_flag(self, index, change):
+        """
+        Adds change to the flag counter the cell at index belongs to
+        """
+        if self.counts[index] == MINE_VALUE:
+            self.flagged_mines += change
+        else:
+            self.wrong_flags += change
+
+    def flag_cell(self, x, y):
+        """
+        Flags the cell logically so that the flag can be drawn and logic
+        can be used to determine if the player has won the game
+        """
+        index = y*self.width+x
+        state = self.cell_state(index)
+        if not state & FLAGGED:
+            self.set_cell_state(index, state | FLAGGED)
+            self.count_flag(index, 1)
+
+    def unflag_cell(self, x, y):
+        """
+        Unlags the cell logically
+        """
+        index = y*self.width+x
+        state = self.cell_state(index)
+        if state & FLAGGED:
+            self.set_cell_state(index, state & ~FLAGGED)
+            self.count_flag(index, -1)
+
+    def reset(self):
+        """
+        Resets the current board so that a new game can be played on it
+        """
+        # moving to the next generation makes every state set so far read
+        # as hidden and unflagged without touching the cells
+        self.generation_base += STATES_PER_GENERATION
+        self.reset_counters()
+
+        # the states only really get cleared when the stamps would no
+        # longer fit in the array, once every billion resets
+        if self.generation_base + STATES_PER_GENERATION >= \
+                1 << (8 * self.states.itemsize):
+            self.clear_states()
+
+
+@dataclass
+class BitBoard(Board):
+    """
+    A Board that keeps the mines, revealed cells and flagged cells as three
+    integer masks with bit y*width+x for the cell at (x, y):
+    mine_mask: bits of the cells containing a mine
+    empty_mask: bits of the cells without a mine or any adjacent mines
+    revealed_mask: bits of the revealed cells
+    flagged_mask: bits of the flagged cells
+    Whole board queries, resets and snapshots are a few integer operations
+    and the flood fill grows a mask over every cell at once
+    """
+    mine_mask: int = field(default=0, init=False, repr=False)
+    empty_mask: int = field(default=0, init=False, repr=False)
+    revealed_mask: int = field(default=0, init=False, repr=False)
+    flagged_mask: int = field(default=0, init=False, repr=False)
+
+    def clear_states(self):
+        """
+        Sets every cell to hidden and unflagged
+        """
+        self.states = None
+        self.revealed_mask = 0
+        self.flagged_mask = 0
+        self.reset_counters()
+
+    def recount(self):
+        """
+        Works the counters out again from the masks
+        """
+        size = self.width * self.height
+        self.flagged_mines = (self.flagged_mask & self.mine_mask).bit_count()
+        self.wrong_flags = (self.flagged_mask & ~self.mine_mask).bit_count()
+        self.hidden_safe_cells = size - self.mine_mask.bit_count() - \
+            (self.revealed_mask & ~self.mine_mask).bit_count()
+
+    def fill_board_with_numbers(self):
+        """
+        Recomputes the counts of every cell along with the mine and empty
+        masks
+        """
+        super().fill_board_with_numbers()
+        self.mine_mask = mask_from_digits(self.counts.translate(MINE_DIGITS))
+        self.empty_mask = mask_from_digits(
+            self.counts.translate(ZERO_DIGITS))
+
+    def move_mine(self, source, target):
+        """
+        Moves the mine at index source to the cell without a mine at index
+        target, updating the masks of the cells around the two cells
+        """
+        super().move_mine(source, target)
+        self.mine_mask ^= (1 << source) | (1 << target)
+        for index in (source, target, *self.neighbours[source],
+                      *self.neighbours[target]):
+            if self.counts[index] == 0:
+                self.empty_mask |= 1 << index
+            else:
+                self.empty_mask &= ~(1 << index)
+
+    def cell_state(self, index):
+        """
+        returns the REVEALED and FLAGGED bits of the cell at the provided
+        index
+        """
+        return ((self.revealed_mask >> index) & 1) | \
+            ((self.flagged_mask >> index) & 1) << 1
+
+    def set_cell_state(self, index, state):
+        """
+        sets the REVEALED and FLAGGED bits of the cell at the provided index
+        """
+        bit = 1 << index
+        if state & REVEALED:
+            self.revealed_mask |= bit
+        else:
+            self.revealed_mask &= ~bit
+        if state & FLAGGED:
+            self.flagged_mask |= bit
+        else:
+            self.flagged_mask &= ~bit
+
+    def cell_states(self):
+        """
+        returns a bytearray of the REVEALED and FLAGGED bits of every cell
+        """
+        size = self.width * self.height
+        # the masks are spread out to a byte per cell, the flagged bytes
+        # doubled and added to the revealed ones never carry into the next
+        states = spread_mask(self.revealed_mask, size) + \
+            2 * spread_mask(self.flagged_mask, size)
+        return bytearray(states.to_bytes(size, 'little'))
+
+    def reveal_cell(self, x, y):
+        """
+        reveals the cell logically so the drawing class can draw the cell
+        and returns the set of (x, y) positions that were newly revealed
+        """
+        index = y*self.width+x
+        if (self.revealed_mask >> index) & 1:
+            return set()
+
+        self.revealed_mask |= 1 << index
+        if self.counts[index] != MINE_VALUE:
+            self.hidden_safe_cells -= 1
+        revealed = {(x, y)}
+        if self.counts[index] == 0:
+            revealed |= self.reveal_surrounding_cells(x, y)
+        return revealed
+
+    def reveal_cells(self, positions: Iterable[Tuple[int, int]]):
+        """
+        Reveals the cells at the provided (x, y) positions together, with
+        one fill spreading out from all of the empty ones at once, and
+        returns the set of (x, y) positions that were newly revealed
+        """
+        width = self.width
+        cells = self.indices_mask([y*width+x for x, y in positions]) & \
+            ~self.revealed_mask
+        self.revealed_mask |= cells
+        self.hidden_safe_cells -= (cells & ~self.mine_mask).bit_count()
+        revealed = {(index % width, index // width)
+                    for index in mask_indices(cells)}
+        empty = cells & self.empty_mask
+        if empty:
+            revealed |= self.reveal_around(mask_indices(empty))
+        return revealed
+
+    def reveal_all_mines(self):
+        """
+        reveals all of the mines on the board
+        """
+        self.revealed_mask |= self.mine_mask
+
+    def indices_mask(self, indices: Sequence[int]):
+        """
+        Returns the mask with the bits of the provided indices set
+        """
+        # shifting a bit into place costs as much as the whole mask on
+        # large boards, so long lists are written out as digits instead
+        if len(indices) < 64:
+            mask = 0
+            for index in indices:
+                mask |= 1 << index
+            return mask
+        digits = bytearray(b'0') * (self.width * self.height)
+        for index in indices:
+            digits[index] = ord('1')
+        return mask_from_digits(digits)
+
+    def show_cells(self, indices: Sequence[int]):
+        """
+        Reveals the cells at the provided indices without revealing any
+        cells around them, for replaying a reveal that was recorded
+        """
+        cells = self.indices_mask(indices) & ~self.revealed_mask
+        self.revealed_mask |= cells
+        self.hidden_safe_cells -= (cells & ~self.mine_mask).bit_count()
+
+    def hide_cells(self, indices: Sequence[int]):
+        """
+        Hides the revealed cells at the provided indices again, for taking
+        back a reveal
+        """
+        cells = self.indices_mask(indices) & self.revealed_mask
+        self.revealed_mask &= ~cells
+        self.hidden_safe_cells += (cells & ~self.mine_mask).bit_count()
+
+    def reveal_around(self, indices: List[int]):
+        """
+        Reveals all empty spaces and numbered spaces around the empty
+        spaces at the provided indices and returns the set of (x, y)
+        positions that were newly revealed
+        """
+        width = self.width
+        full, not_first_column, not_last_column = edge_masks(width,
+                                                             self.height)
+        # empty cells that were revealed or flagged before stop the fill,
+        # the same as they do on a Board
+        untouched = ~(self.revealed_mask | self.flagged_mask)
+        spreads = self.empty_mask & untouched
+
+        # grow the region of empty cells by one cell in every direction at
+        # a time until it stops growing. The column masks stop cells at the
+        # end of a row from spilling into the next one. Every starting cell
+        # grows at once, so a batch of reveals takes a single fill
+        region = self.indices_mask(indices)
+        while True:
+            grown = region | ((region << 1) & not_first_column) | \
+                ((region >> 1) & not_last_column)
+            grown = (grown | (grown << width) | (grown >> width)) & full
+            larger = region | (grown & spreads)
+            if larger == region:
+                break
+            region = larger
+
+        # everything around the region is revealed except the mines and
+        # the flagged cells
+        revealed = grown & ~self.mine_mask & untouched
+        self.revealed_mask |= revealed
+        indices = mask_indices(revealed)
+        self.hidden_safe_cells -= len(indices)
+        return {(index % width, index // width) for index in indices}
+
+    def revealed_count(self):
+        """
+        Returns the number of revealed cells
+        """
+        return self.revealed_mask.bit_count()
+
+    def flag_count(self):
+        """
+        Returns the number of flagged cells
+        """
+        return self.flagged_mask.bit_count()
+
+    def flag_cell(self, x, y):
+        """
+        Flags the cell logically so that the flag can be drawn and logic
+        can be used to determine if the player has won the game
+        """
+        index = y*self.width+x
+        if not (self.flagged_mask >> index) & 1:
+            self.flagged_mask |= 1 << index
+            self.count_flag(index, 1)
+
+    def unflag_cell(self, x, y):
+        """
+        Unlags the cell logically
+        """
+        index = y*self.width+x
+        if (self.flagged_mask >> index) & 1:
+            self.flagged_mask &= ~(1 << index)
+            self.count_flag(index, -1)
+
+    def reset(self):
+        """
+        Resets the current board so that a new game can be played on it
+        """
+        self.clear_states()
+
+    def masks(self):
+        """
+        Returns the mine, revealed and flagged cells as integer masks with
+        bit y*width+x for the cell at (x, y)
+        """
+        return self.mine_mask, self.revealed_mask, self.flagged_mask
+
+    def load_masks(self, revealed_mask, flagged_mask):
+        """
+        Sets the revealed and flagged cells from integer masks like the
+        ones returned by masks()
+        """
+        self.revealed_mask = revealed_mask
+        self.flagged_mask = flagged_mask
+        self.recount()
+
+    def snapshot(self):
+        """
+        Returns the revealed and flagged masks so the board can be put back
+        the way it is now with restore()
+        """
+        return self.revealed_mask, self.flagged_mask
+
+    def restore(self, snapshot):
+        """
+        Puts the board back the way it was when the snapshot was taken
+        """
+        self.load_masks(*snapshot)
+
+
+class BoardFactory():
+    """
+    Builds boards ahead of time on a background thread and keeps a few of
+    them ready for every (width, height, mines) setup that has been asked
+    for, so a new game starts without waiting for its board:
+    board_class: the Board class boards are built with
+    pool_size: number of boards kept ready for each setup
+    """
+
+    def __init__(self, board_class=Board, pool_size=2):
+        self.board_class = board_class
+        self.pool_size = pool_size
+        self._pools: Dict[Tuple[int, int, int], Deque[Future]] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="board-factory")
+
+    def build(self, width, height, num_mines, seed=None):
+        """
+        Builds a board straight away
+        """
+        return self.board_class(width=width, height=height,
+                                number_of_mines=num_mines, seed=seed)
+
+    def prefetch(self, width, height, num_mines):
+        """
+        Starts building boards with the provided setup until pool_size of
+        them are ready or on the way
+        """
+        pool = self._pools.setdefault((width, height, num_mines), deque())
+        while len(pool) < self.pool_size:
+            pool.append(self._executor.submit(self.build, width, height,
+                                              num_mines))
+
+    def take(self, width, height, num_mines, seed=None):
+        """
+        Returns a board with the provided setup, one that is already built
+        when there is one, and starts building its replacement. Boards with
+        a seed are always built on the spot
+        """
+        if seed is not None:
+            return self.build(width, height, num_mines, seed)
+        pool = self._pools.get((width, height, num_mines))
+        if pool:
+            board = pool.popleft().result()
+        else:
+            board = self.build(width, height, num_mines)
+        self.prefetch(width, height, num_mines)
+        return board
+
+    def close(self):
+        """
+        Stops building boards
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
+
+
+@lru_cache(maxsize=32)
+def column_header(width):
+    """
+    Returns the line of column labels drawn above a board of the provided
+    width
+    """
+    return '  ' + ''.join(position_label(x) for x in range(width)) + '\n'
+
+
+@lru_cache(maxsize=32)
+def row_labels(height):
+    """
+    Returns the labels drawn at the start of every row of a board of the
+    provided height
+    """
+    return tuple(f"{position_label(y)} " for y in range(height))
+
+
+# The character drawn for a cell indexed by its state bits and then
+# its Board.counts value
+STATE_CHARACTERS = (
+    (UNCHECKED_SPACE,) * len(CELL_CHARACTERS),
+    CELL_CHARACTERS,
+    (FLAG,) * len(CELL_CHARACTERS),
+    CELL_CHARACTERS,
+)
+
+# ANSI escape codes used to draw in place
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+CLEAR_LINE = '\x1b[K'
+SAVE_CURSOR = '\x1b7'
+RESTORE_CURSOR = '\x1b8'
+RESET_SCROLL_REGION = '\x1b[r'
+
+
+def move_cursor(line, column):
+    """
+    Returns the ANSI code that moves the cursor to the 1 based line, column
+    """
+    return f'\x1b[{line};{column}H'
+
+
+def scroll_region(top, bottom):
+    """
+    Returns the ANSI code that only lets lines top to bottom scroll
+    """
+    return f'\x1b[{top};{bottom}r'
+
+
+@dataclass
+class Display():
+    """
+    Handles displaying the board based on the state of all cells:
+    stream: file the frames are written to
+    ansi: when True the board is drawn once at the top of the terminal and
+        after that only the cells that changed are redrawn in place using
+        ANSI escape codes. Everything else scrolls underneath the board
+    """
+    stream: TextIO = field(default_factory=lambda: sys.stdout)
+    ansi: bool = field(default=False)
+    # the board and the characters on screen from the last ANSI frame
+    _frame_board: Optional[Board] = field(default=None, init=False,
+                                          repr=False)
+    _frame: List[List[str]] = field(default_factory=list, init=False,
+                                    repr=False)
+
+    def board_rows(self, board: Board):
+        """
+        Returns the characters of every row of the board
+        """
+        counts = board.counts
+        states = board.cell_states()
+        width = board.width
+        return [
+            [STATE_CHARACTERS[state][count]
+             for state, count in zip(states[start:start + width],
+                                     counts[start:start + width])]
+            for start in range(0, width * board.height, width)
+        ]
+
+    def display_board(self, board: Board, mines_left: int,
+                      changed: Optional[Iterable[Tuple[int, int]]] = None):
+        """
+        Displays the contents of the board based on if the cell is revealed
+        or not. The whole frame is built first and written at once.
+        In ANSI mode changed can be the (x, y) cells that changed since the
+        last frame, otherwise every cell is checked for changes
+        """
+        # We don't want to try and work with an empty list
+        if not len(board.counts):
+            return
+
+        if not self.ansi:
+            labels = row_labels(board.height)
+            frame = [column_header(board.width)]
+            for y, row in enumerate(self.board_rows(board)):
+                frame.append(labels[y])
+                frame.extend(row)
+                frame.append('\n')
+            frame.append(f"Mines left: {mines_left}\n")
+            self.stream.write(''.join(frame))
+            self.stream.flush()
+            return
+
+        if self._frame_board is not board or \
+                len(self._frame) != board.height or \
+                len(self._frame[0]) != board.width:
+            self.redraw_board(board, mines_left)
+            return
+
+        # only draw the cells that are different from what is on screen
+        if changed is None:
+            rows = self.board_rows(board)
+            changed = ((x, y)
+                       for y, row in enumerate(rows)
+                       if row != self._frame[y]
+                       for x in range(board.width)
+                       if row[x] != self._frame[y][x])
+        frame = [SAVE_CURSOR]
+        for x, y in changed:
+            index = y*board.width+x
+            character = STATE_CHARACTERS[board.cell_state(index)][
+                board.counts[index]]
+            if self._frame[y][x] != character:
+                self._frame[y][x] = character
+                # the column header takes the first line and the row label
+                # the first two columns
+                frame.append(move_cursor(y + 2, x + 3) + character)
+        frame.append(move_cursor(board.height + 2, 1) + CLEAR_LINE +
+                     f"Mines left: {mines_left}")
+        frame.append(RESTORE_CURSOR)
+        self.stream.write(''.join(frame))
+        self.stream.flush()
+
+    def redraw_board(self, board: Board, mines_left: int):
+        """
+        Clears the terminal and draws the whole board in ANSI mode. The
+        lines under the board become the only ones that scroll
+        """
+        self._frame_board = board
+        self._frame = self.board_rows(board)
+        labels = row_labels(board.height)
+        frame = [RESET_SCROLL_REGION, CLEAR_SCREEN, column_header(board.width)]
+        for y, row in enumerate(self._frame):
+            frame.append(labels[y])
+            frame.extend(row)
+            frame.append('\n')
+        frame.append(f"Mines left: {mines_left}\n")
+        lines = shutil.get_terminal_size().lines
+        if lines > board.height + 3:
+            frame.append(scroll_region(board.height + 3, lines))
+        frame.append(move_cursor(board.height + 3, 1))
+        self.stream.write(''.join(frame))
+        self.stream.flush()
+
+    def restore_terminal(self):
+        """
+        Lets the whole terminal scroll again after drawing in ANSI mode
+        """
+        if self.ansi and self._frame_board is not None:
+            self.stream.write(RESET_SCROLL_REGION)
+            self.stream.flush()
+            self._frame_board = None
+
+    def display_probabilities(self, board: Board, heatmap):
+        """
+        Displays the board with every hidden cell replaced by the chance
+        of it being a mine in tens of percent, 0-9, or a flag when it is
+        certain to be a mine. The whole frame is built first and written at
+        once
+        """
+        labels = row_labels(board.height)
+        frame = [column_header(board.width)]
+        for y in range(board.height):
+            frame.append(labels[y])
+            for x in range(board.width):
+                if board.is_revealed(x, y):
+                    frame.append(board.get_cell_character(x, y))
+                    continue
+                probability = heatmap.probability(x, y)
+                if probability >= 1:
+                    frame.append(FLAG)
+                else:
+                    frame.append(str(int(probability * 10)))
+            frame.append('\n')
+        self.stream.write(''.join(frame))
+        self.stream.flush()
+
+    def debug_display(self, board: Board):
+        """
+        Displays the contents of all cells on the board.
+        """
+        # We don't want to try and work with an empty list
+        if not len(board.counts):
+            return
+
+        # Loop through x and y positions then check each cell
+        # at the positions to see if they are revealed or not
+        # if they are then draw the cell otherwise draw the
+        # not revealed character
+        frame = []
+        for y in range(board.height):
+            for x in range(board.width):
+                frame.append(board.get_cell_character(x, y))
+            frame.append('\n')
+        self.stream.write(''.join(frame))
+        self.stream.flush()
+
+
+# Moves kept by a Journal before the oldest ones are dropped
+DEFAULT_JOURNAL_LIMIT = 1000
+
+
+@dataclass
+class JournalEntry():
+    """
+    What one move or batch of moves changed:
+    cells: array of the indices of the cells that were revealed
+    flags: array of the indices of the cells whose flag was placed or
+        taken off
+    mines_left: how much the mines left changed by
+    moves: number of moves that were applied
+    state: State of the game before the moves
+    result: State of the game after the moves
+    """
+    cells: array = field(default_factory=lambda: array('I'))
+    flags: array = field(default_factory=lambda: array('I'))
+    mines_left: int = field(default=0)
+    moves: int = field(default=1)
+    state: State = field(default=State.PLAYING)
+    result: State = field(default=State.PLAYING)
+
+    def positions(self, width):
+        """
+        Returns the set of (x, y) positions of the cells that were revealed
+        on a board of the provided width
+        """
+        return {(index % width, index // width) for index in self.cells}
+
+    def flag_positions(self, width):
+        """
+        Returns the set of (x, y) positions of the cells whose flag changed
+        """
+        return {(index % width, index // width) for index in self.flags}
+
+    def toggle_flags(self, board: Board):
+        """
+        Takes off the flags the entry placed and puts back the ones it took
+        off, or the other way around when it is called again
+        """
+        for x, y in self.flag_positions(board.width):
+            if board.is_flagged(x, y):
+                board.unflag_cell(x, y)
+            else:
+                board.flag_cell(x, y)
+
+    def update_flagged_locations(self, board: Board,
+                                 flagged_locations: Set[Tuple[int, int]]):
+        """
+        Makes flagged_locations match the board at the cells whose flag
+        was just changed back or changed again
+        """
+        for x, y in self.flag_positions(board.width):
+            if board.is_flagged(x, y):
+                flagged_locations.add((x, y))
+            else:
+                flagged_locations.discard((x, y))
+
+
+class Journal():
+    """
+    Records the changes made by every move so they can be undone and redone
+    without copying the board. Undoing or redoing a move only touches the
+    cells it changed:
+    limit: number of moves that can be undone, older moves are dropped
+        once there are more. 0 keeps none and None keeps every move
+    """
+
+    def __init__(self, limit: Optional[int] = DEFAULT_JOURNAL_LIMIT):
+        self.limit = limit
+        self.undo_entries: Deque[JournalEntry] = deque(maxlen=limit)
+        self.redo_entries: List[JournalEntry] = []
+
+    def record(self, entry: JournalEntry):
+        """
+        Adds a move that was just played. Moves that were undone can't be
+        redone after a new move
+        """
+        self.undo_entries.append(entry)
+        self.redo_entries.clear()
+
+    def clear(self):
+        """
+        Forgets every move
+        """
+        self.undo_entries.clear()
+        self.redo_entries.clear()
+
+    def undo(self, board: Board) -> Optional[JournalEntry]:
+        """
+        Takes back the last move on the board and returns its entry, or
+        None if there is nothing to undo
+        """
+        if not self.undo_entries:
+            return None
+        entry = self.undo_entries.pop()
+        entry.toggle_flags(board)
+        board.hide_cells(entry.cells)
+        self.redo_entries.append(entry)
+        return entry
+
+    def redo(self, board: Board) -> Optional[JournalEntry]:
+        """
+        Plays the last undone move on the board again and returns its
+        entry, or None if there is nothing to redo
+        """
+        if not self.redo_entries:
+            return None
+        entry = self.redo_entries.pop()
+        entry.toggle_flags(board)
+        board.show_cells(entry.cells)
+        self.undo_entries.append(entry)
+        return entry
+
+
+@dataclass
+class Game():
+    """
+    Plays a single game without any terminal input or output so the game
+    can be driven by code:
+    board: the Board being played
+    state: State.PLAYING until the player wins or loses
+    mines_left: number of mines minus the number of flags placed
+    moves: number of moves that have been applied
+    flagged_locations: Set of (x, y) tuples for all flagged cells
+    last_revealed: Set of (x, y) tuples revealed by the last move
+    win_rule: one of WIN_RULES deciding when the game is won
+    safe_first_click: when True the mines around the first cell revealed
+        are moved away from it
+    journal: Journal of the moves played so they can be undone
+    """
+    board: Board = field(default_factory=Board)
+    state: State = field(default=State.PLAYING)
+    mines_left: int = field(init=False)
+    moves: int = field(default=0)
+    flagged_locations: Set[Tuple[int, int]] = field(default_factory=set)
+    last_revealed: Set[Tuple[int, int]] = field(default_factory=set)
+    win_rule: str = field(default=WIN_BY_EITHER)
+    safe_first_click: bool = field(default=True)
+    journal: Journal = field(default_factory=Journal, repr=False)
+
+    def __post_init__(self):
+        """
+        Starts with no flags placed on the board
+        """
+        self.mines_left = self.board.number_of_mines
+
+    def apply_move(self, command: str, x, y):
+        """
+        Applies a reveal, chord, flag or unflag command to the cell at
+        (x, y) and returns the state of the game. Revealing a revealed
+        number chords it. Moves that aren't allowed leave the game
+        untouched
+        """
+        self.apply_moves(((command, x, y),))
+        return self.state
+
+    def apply_moves(self, moves: Iterable[Tuple[str, int, int]]):
+        """
+        Applies a batch of (command, x, y) moves. Flags are placed and taken
+        off in order while the cells to reveal are collected and revealed
+        together at the end, then the game is checked for a win or loss
+        once. Moves that aren't allowed are skipped and a message for each
+        of them is returned in a list
+        """
+        board = self.board
+        width = board.width
+        self.last_revealed = set()
+        rejected: List[str] = []
+        if self.state != State.PLAYING:
+            return rejected
+
+        entry = JournalEntry(moves=0, state=self.state)
+        reveals = []
+        # cells an earlier move of the batch is going to reveal count as
+        # revealed, so they can't be flagged before the reveal happens
+        queued = set()
+        for command, x, y in moves:
+            if command in (Commands.REVEAL.value, Commands.CHORD.value) and \
+                    board.is_revealed(x, y):
+                # a number with all of its mines flagged opens up the rest
+                # of the cells around it
+                cells = [cell for cell in board.chord_cells(x, y)
+                         if cell not in queued]
+                if not cells:
+                    rejected.append(f"Cell ({x}, {y}) is already revealed")
+                    continue
+                reveals.extend(cells)
+                queued.update(cells)
+            # Don't let the player reveal a cell that is already revealed
+            elif board.is_revealed(x, y) or (x, y) in queued:
+                rejected.append(f"Cell ({x}, {y}) is already revealed")
+                continue
+            elif command == Commands.REVEAL.value:
+                if board.is_flagged(x, y):
+                    rejected.append(f"Cell ({x}, {y}) is already flagged")
+                    continue
+                reveals.append((x, y))
+                queued.add((x, y))
+            elif command == Commands.FLAG.value:
+                if board.is_flagged(x, y):
+                    rejected.append(f"Cell ({x}, {y}) is already flagged")
+                    continue
+                board.flag_cell(x, y)
+                self.flagged_locations.add((x, y))
+                entry.flags.append(y*width+x)
+                entry.mines_left -= 1
+            elif command == Commands.UNFLAG.value:
+                if not board.is_flagged(x, y):
+                    rejected.append(f"Cell ({x}, {y}) is not flagged")
+                    continue
+                board.unflag_cell(x, y)
+                self.flagged_locations.discard((x, y))
+                entry.flags.append(y*width+x)
+                entry.mines_left += 1
+            elif command == Commands.CHORD.value:
+                rejected.append(f"Cell ({x}, {y}) is not revealed")
+                continue
+            else:
+                rejected.append(f"{command} is not a move")
+                continue
+            entry.moves += 1
+        if not entry.moves:
+            return rejected
+
+        if reveals:
+            # the first cell revealed never has a mine around it
+            if (self.safe_first_click and not board.first_click_cleared and
+                    board.is_untouched()):
+                board.clear_first_click(*reveals[0])
+            mines = [(x, y) for x, y in reveals if board.is_mine(x, y)]
+            # reveal every safe cell with a single fill and potentially
+            # other cells around them
+            self.last_revealed = board.reveal_cells(
+                (x, y) for x, y in reveals if not board.is_mine(x, y))
+            entry.cells = array('I', (row*width+column
+                                      for column, row in self.last_revealed))
+            # if any cell is a mine then reveal all mines and set game state
+            # to lost
+            if mines:
+                entry.cells.extend(board.hidden_mines())
+                board.reveal_all_mines()
+                self.state = State.PLAYER_LOST
+
+        self.mines_left += entry.mines_left
+        # taking off a wrong flag can be what wins the game
+        if self.state == State.PLAYING and self.check_win():
+            self.state = State.PLAYER_WON
+        self.moves += entry.moves
+        entry.result = self.state
+        self.journal.record(entry)
+        return rejected
+
+    def undo(self) -> Optional[JournalEntry]:
+        """
+        Takes back the last move and returns its journal entry, or None if
+        there was nothing to undo. Bots can use this to back out of a line
+        of moves they were trying
+        """
+        entry = self.journal.undo(self.board)
+        if entry is None:
+            return None
+        self.moves -= entry.moves
+        self.mines_left -= entry.mines_left
+        self.state = entry.state
+        self.last_revealed = set()
+        entry.update_flagged_locations(self.board, self.flagged_locations)
+        return entry
+
+    def redo(self) -> Optional[JournalEntry]:
+        """
+        Plays the last undone move again and returns its journal entry, or
+        None if there was nothing to redo
+        """
+        entry = self.journal.redo(self.board)
+        if entry is None:
+            return None
+        self.moves += entry.moves
+        self.mines_left += entry.mines_left
+        self.state = entry.result
+        self.last_revealed = entry.positions(self.board.width)
+        entry.update_flagged_locations(self.board, self.flagged_locations)
+        return entry
+
+    def check_win(self):
+        """
+        Returns True if the board is won under the game's win rule
+        """
+        return self.board.is_won(self.win_rule)
+
+
+@dataclass
+class Controller():
+    """
+    Controls all logic of the game from updating the board
+    to notifying the display class to draw the game
+    """
+
+    Commands = Commands
+
+    display: Display = field(default_factory=Display)
+    # the Game being played, it applies the moves and keeps the board,
+    # flags, mines left and journal. None when no game could be built
+    game: Optional[Game] = field(default=None)
+    # the Board class new games are built with, Board or BitBoard
+    board_class: type = field(default=Board, repr=False)
+    # one of WIN_RULES deciding when the game is won
+    win_rule: str = field(default=WIN_BY_EITHER)
+    # moves the mines around the first cell revealed away from it
+    safe_first_click: bool = field(default=True)
+    # builds boards ahead of time when set, otherwise every board is built
+    # when the game starts
+    factory: Optional[BoardFactory] = field(default=None, repr=False)
+    # measures the hot paths when set, its summary is printed on quit
+    instrumentation: object = field(default=None, repr=False)
+    # moves of each game that can be undone, 0 turns undo off and None
+    # keeps every move
+    undo_limit: Optional[int] = field(default=DEFAULT_JOURNAL_LIMIT,
+                                      repr=False)
+    current_state: State = field(default=State.MENU)
+    mode: Commands = field(default=Commands.REVEAL)
+    solver: object = field(default=None, repr=False)
+    # the (x, y) cells changed since the board was last drawn, None when
+    # every cell has to be checked
+    changed_cells: Optional[Set[Tuple[int, int]]] = field(default=None,
+                                                          repr=False)
+
+    def __post_init__(self):
+        """
+        Builds the state machine and starts a game on a default board if
+        none was provided
+        """
+        if self.game is None:
+            self.start_game(self.board_class())
+        self.states = {
+            State.MENU.value: self.process_menu,
+            State.NEW_GAME.value: self.process_new_game,
+            State.RESET.value: self.reset_game,
+            State.PLAYING.value: self.process_playing,
+            State.PLAYER_WON.value: self.process_win,
+            State.PLAYER_LOST.value: self.process_loss,
+            State.PLAYER_QUIT.value: self.process_quit,
+        }
+
+    @property
+    def board(self):
+        return self.game.board if self.game is not None else None
+
+    @property
+    def mines_left(self):
+        return self.game.mines_left
+
+    @property
+    def flagged_locations(self):
+        return self.game.flagged_locations
+
+    def start_game(self, board: Board):
+        """
+        Starts a game on the board under the controller's win rule, first
+        click and undo settings
+        """
+        self.game = Game(board, win_rule=self.win_rule,
+                         safe_first_click=self.safe_first_click,
+                         journal=Journal(self.undo_limit))
+        self.solver = None
+
+    def build_new_game(self, width, height, num_mines, seed=None,
+                       no_guess=False):
+        """
+        initializes and returns True with the provided parameters
+        if they are in the correct range otherwise prints an error message
+        and returns False. A seed can be provided to replay a board. With
+        no_guess the board can be solved without guessing from a cell that
+        is already revealed
+        """
+        MAX_MINE_COUNT = max_mine_count(width, height)
+
+        # Create the board if all provided parameters fall within the min and
+        # max thresholds. Otherwise print the thresholds and don't create the
+        # board
+        if is_valid_board_setup(width, height, num_mines):
+
+            board = None
+            if no_guess:
+                board = self.load_no_guess_board(width, height, num_mines)
+            if board is None and self.factory is not None:
+                board = self.factory.take(width, height, num_mines, seed)
+            elif board is None:
+                board = self.board_class(
+                    width=width,
+                    height=height,
+                    number_of_mines=num_mines,
+                    seed=seed
+                )
+            self.start_game(board)
+            print("New Game!\n")
+            self.current_state = State.PLAYING
+        else:
+            print(f"Invalid board setup: {width}x{height} {num_mines}")
+            print(f"Height range: {MIN_BOARD_HEIGHT}-{MAX_BOARD_HEIGHT}")
+            print(f"Width range: {MIN_BOARD_WIDTH}-{MAX_BOARD_WIDTH}")
+            print(f"Mine range for board size: {MIN_MINE_COUNT}-{MAX_MINE_COUNT}")  # noqa: E501
+            self.game = None
+
+    def load_no_guess_board(self, width, height, num_mines):
+        """
+        Returns a board that can be solved without guessing with its start
+        cell revealed, or None if none could be found in time. Boards come
+        from the no-guess cache, they are generated when the cache doesn't
+        have any for the setup and the extra ones found are cached for the
+        next games
+        """
+        from noguess import NoGuessCache, build_board, generate
+
+        cache = NoGuessCache()
+        entry = cache.take(width, height, num_mines)
+        if entry is None:
+            print("Generating a no-guess board...")
+            entries = generate(width, height, num_mines, 1,
+                               time_limit=NO_GUESS_TIME_LIMIT).entries
+            if not entries:
+                print(f"No no-guess board found for {width}x{height} "
+                      f"{num_mines} in {NO_GUESS_TIME_LIMIT}s, starting a "
+                      f"normal game")
+                return None
+            entry = entries.pop()
+            cache.add(width, height, num_mines, entries)
+        board = build_board(width, height, num_mines, entry,
+                            self.board_class)
+        board.reveal_cell(entry[1], entry[2])
+        return board
+
+    def reset_game(self):
+        """
+        Resets the game to be retried
+        """
+        self.board.reset()
+        self.start_game(self.board)
+        self.current_state = State.PLAYING
+
+    @staticmethod
+    def convert_move_to_xy(move: str):
+        """
+        Converts the user move from str to (x, y) tuple of ints. A move is
+        either a col and row character such as "3a" or the decimal x and y
+        separated by a comma such as "12,30" for cells past the first 36
+        columns and rows. Raises ValueError for a comma move that isn't two
+        numbers
+        """
+        if ',' in move:
+            x, y = move.split(',')
+            return (int(x), int(y))
+
+        move = [char for char in move]
+        col = move[0]
+        row = move[1]
+        x = -1
+        y = -1
+
+        # if the unicode for the entered column is less than
+        # the unicode for the character '9' then set x to the
+        # integer representation of column
+        if ord(col) >= ord('0') and ord(col) <= ord('9'):
+            x = int(col)
+
+        # the character is set to 10 + the difference between the unicode
+        # for the entered character minus the unicode for the character 'a'
+        # example: col = 'c', ord(col) = 99, ord('a') = 97
+        # 99 - 97 = 2 + 10 = 12 for column 12
+        # really column 13 since counting starts from 0
+        else:
+            x = int(ord(col) - ord('a') + 10)
+
+        # Same thing as before for the row
+        if ord(row) >= ord('0') and ord(row) <= ord('9'):
+            y = int(row)
+        else:
+            y = int(ord(row) - ord('a') + 10)
+
+        return (x, y)
+
+    @staticmethod
+    def convert_xy_to_move(x, y):
+        """
+        Converts an (x, y) tuple of ints to the col and row the player
+        types, or to "x,y" when either one is too large for a single
+        character
+        """
+        if max(x, y) >= MAX_LABEL:
+            return f"{x},{y}"
+        return position_label(x) + position_label(y)
+
+    def check_win(self):
+        """
+        Returns True if the board is won under the game's win rule
+        """
+        return self.game.check_win()
+
+    def get_command(self):
+        """
+        Gets the players command and returns it
+        """
+        print("Commands - reveal, flag, unflag, chord, undo, redo, hint, "
+              "probability, new, reset, save, load, quit")
+        command = input("Enter a command (default is reveal): ")
+        if not command:
+            return self.Commands.REVEAL.value
+        else:
+            return command
+
+    def get_move(self):
+        """
+        Gets the move from player
+        """
+        while True:
+            move = input("Enter col and row, or x,y (several cells "
+                         "separated by spaces): ")
+            if move:
+                return move
+
+    @staticmethod
+    def validate_input_length(move: str):
+        """
+        Validates that user input is correct length, two characters or
+        an x and y separated by a comma
+        """
+        return len(move) == 2 or move.count(',') == 1
+
+    @staticmethod
+    def parse_position(move: str, width, height):
+        """
+        Returns the (x, y) tuple for the move or None if the move isn't a
+        cell on a board of the provided size
+        """
+        if not Controller.validate_input_length(move):
+            return None
+        try:
+            x, y = Controller.convert_move_to_xy(move)
+        except ValueError:
+            return None
+        if x < 0 or x >= width or y < 0 or y >= height:
+            return None
+        return (x, y)
+
+    def parse_move(self, move: str):
+        """
+        Returns the (x, y) tuple for the move or None if the move isn't a
+        cell on the board
+        """
+        return self.parse_position(move, self.board.width, self.board.height)
+
+    def parse_moves(self, command: str, moves: Iterable[str]):
+        """
+        Returns the (command, x, y) batch for the moves that are cells on
+        the board, or None if any of them isn't
+        """
+        batch = []
+        for move in moves:
+            move_position = self.parse_move(move)
+            if move_position is None:
+                return None
+            batch.append((command, *move_position))
+        return batch
+
+    def process_command(self, command: str):
+        """
+        Processes user commands
+        """
+        command = command.lower()
+        if (command == self.Commands.REVEAL.value or
+                command == self.Commands.FLAG.value or
+                command == self.Commands.UNFLAG.value or
+                command == self.Commands.CHORD.value):
+            self.mode = command
+            # several cells can be entered at once and are played as one
+            # batch
+            batch = self.parse_moves(command, self.get_move().split())
+            if batch is not None:
+                self.process_moves(batch)
+        elif command == self.Commands.NEW.value:
+            self.current_state = State.NEW_GAME
+        elif command == self.Commands.RESET.value:
+            self.current_state = State.RESET
+        elif command == self.Commands.QUIT.value:
+            self.current_state = State.PLAYER_QUIT
+        elif command == self.Commands.HINT.value:
+            self.process_hint()
+        elif command == self.Commands.PROBABILITY.value:
+            self.process_probability()
+        elif command == self.Commands.SAVE.value:
+            self.save_game(input("Save to file: "))
+        elif command == self.Commands.LOAD.value:
+            self.load_game(input("Load from file: "))
+        elif command == self.Commands.UNDO.value:
+            self.process_undo()
+        elif command == self.Commands.REDO.value:
+            self.process_redo()
+
+    def save_game(self, path):
+        """
+        Saves the board to a file and returns True if it was saved
+        """
+        from savefile import save_board
+
+        try:
+            save_board(path, self.board)
+        except OSError as error:
+            print(f"Could not save to {path}: {error.strerror}")
+            return False
+        except ValueError as error:
+            print(f"Could not save to {path}: {error}")
+            return False
+        print(f"Saved to {path}")
+        return True
+
+    def load_game(self, path):
+        """
+        Carries on the game saved in a file and returns True if it was
+        loaded
+        """
+        from savefile import load_board
+
+        try:
+            board = load_board(path, self.board_class)
+        except OSError as error:
+            print(f"Could not load {path}: {error.strerror}")
+            return False
+        except ValueError as error:
+            print(f"Could not load {path}: {error}")
+            return False
+
+        self.start_game(board)
+        game = self.game
+        game.flagged_locations.update(
+            (index % board.width, index // board.width)
+            for index, state in enumerate(board.cell_states())
+            if state & FLAGGED
+        )
+        game.mines_left -= len(game.flagged_locations)
+        self.changed_cells = None
+        if any(board.is_revealed(x, y) for x, y in board.mine_locations):
+            game.state = State.PLAYER_LOST
+        elif game.check_win():
+            game.state = State.PLAYER_WON
+        self.current_state = game.state
+        print(f"Loaded {path}")
+        return True
+
+    def load_solver(self):
+        """
+        Returns the solver for the current board
+        """
+        # the solver is only loaded the first time it is needed and is kept
+        # up to date with every reveal after that
+        if self.solver is None:
+            from solver import Solver
+            self.solver = Solver(self.board)
+        return self.solver
+
+    def process_hint(self):
+        """
+        Prints a move that is certain to be correct if one can be deduced
+        from the revealed numbers
+        """
+        move = self.load_solver().next_move()
+        if move is None:
+            print("Hint: nothing is certain, you'll have to guess")
+        else:
+            command, x, y = move
+            print(f"Hint: {command} {self.convert_xy_to_move(x, y)}")
+
+    def process_probability(self):
+        """
+        Shows the chance of every hidden cell being a mine and the cell that
+        is safest to reveal
+        """
+        from probability import ProbabilityEngine
+
+        engine = ProbabilityEngine(self.board, self.load_solver())
+        heatmap = engine.heatmap()
+        self.display.display_probabilities(self.board, heatmap)
+        safest = engine.safest_cell(heatmap)
+        if safest is not None:
+            x, y = safest
+            print(f"Safest cell: {self.convert_xy_to_move(x, y)} "
+                  f"({heatmap.probability(x, y):.0%} chance of a mine)")
+
+    def process_move(self, x, y):
+        """
+        processes the player's move and returns True if it was played
+        """
+        return self.process_moves([(self.mode, x, y)])
+
+    def process_moves(self, moves: Iterable[Tuple[str, int, int]]):
+        """
+        processes a batch of (command, x, y) moves by applying them to the
+        game, so the whole batch is checked for a win or loss once and
+        drawn once. Prints a message for every move that isn't allowed and
+        returns True if any of the moves was played
+        """
+        game = self.game
+        moves = list(moves)
+        played = game.moves
+        for message in game.apply_moves(moves):
+            print(f"Invalid Move: {message}")
+        if game.moves == played:
+            return False
+
+        self.current_state = game.state
+        self.changed_cells = game.last_revealed | {
+            (x, y) for command, x, y in moves
+            if command in (self.Commands.FLAG.value,
+                           self.Commands.UNFLAG.value)
+        }
+        if self.solver is not None:
+            self.solver.update(game.last_revealed)
+        return True
+
+    def process_undo(self):
+        """
+        Takes back the last move, including the one that lost the game, and
+        returns True if there was one
+        """
+        entry = self.game.undo()
+        if entry is None:
+            if self.game.journal.limit == 0:
+                print("Undo is turned off")
+            else:
+                print("Nothing to undo")
+            return False
+        self.current_state = self.game.state
+        self.changed_cells = entry.positions(self.board.width) | \
+            entry.flag_positions(self.board.width)
+        # the solver can't forget cells, it is rebuilt when it is next used
+        self.solver = None
+        return True
+
+    def process_redo(self):
+        """
+        Plays the last undone move again and returns True if there was one
+        """
+        entry = self.game.redo()
+        if entry is None:
+            print("Nothing to redo")
+            return False
+        self.current_state = self.game.state
+        revealed = self.game.last_revealed
+        self.changed_cells = revealed | \
+            entry.flag_positions(self.board.width)
+        if self.solver is not None:
+            self.solver.update(revealed)
+        return True
+
+    def run(self):
+        """
+        Runs the state machine
+        """
+        while True:
+            self.states[self.current_state.value]()
+            if self.current_state == State.PLAYER_QUIT:
+                self.process_quit()
+                break
+
+    def run_script(self, lines: Iterable[str],
+                   replay_log: Optional[TextIO] = None,
+                   verbose: bool = False, seed: Optional[int] = None):
+        """
+        Plays a stream of commands such as "new 9 9 10", "reveal 3a" or
+        "flag 05" without prompting or drawing the board between moves and
+        draws the final board at the end. A move without a command is a
+        reveal. When verbose is True a result line is printed for every
+        command. Every command is written to replay_log, starting with the
+        seed of the board, so the log can be run as a script to play the
+        exact same game again. "save file" and "load file" save the board
+        to a file and carry on a saved one, "undo" and "redo" take back and
+        replay moves. A command followed by several cells, such as
+        "flag 05 12,30", plays them all as one batch
+        """
+        def log(line):
+            if replay_log is not None:
+                replay_log.write(line + '\n')
+
+        def report(line, result):
+            if verbose:
+                print(f"{line}: {result}")
+
+        moves = (self.Commands.REVEAL.value, self.Commands.FLAG.value,
+                 self.Commands.UNFLAG.value, self.Commands.CHORD.value)
+        started = False
+        for line in lines:
+            # file names are the only part of a line that keeps its case
+            original = line.split('#')[0].strip()
+            line = original.lower()
+            if not line:
+                continue
+            words = line.split()
+            if len(words) == 1 and words[0] not in \
+                    [command.value for command in self.Commands]:
+                words.insert(0, self.Commands.REVEAL.value)
+
+            # scripts that don't start with a new or loaded game play a
+            # default one
+            if not started and words[0] not in (self.Commands.NEW.value,
+                                                self.Commands.LOAD.value):
+                words_for_default = ["new", str(DEFAULT_BOARD_WIDTH),
+                                     str(DEFAULT_BOARD_HEIGHT),
+                                     str(DEFAULT_MINE_COUNT)]
+                if seed is not None:
+                    words_for_default.append(str(seed))
+                self.run_script_new_game(words_for_default, log, report)
+            started = True
+
+            command = words[0]
+            if command == self.Commands.NEW.value:
+                self.run_script_new_game(words, log, report)
+            elif command == self.Commands.LOAD.value and len(words) > 1:
+                path = original.split(maxsplit=1)[1]
+                log(f"{command} {path}")
+                with redirect_stdout(io.StringIO()) as messages:
+                    loaded = self.load_game(path)
+                report(line, f"loaded {self.current_state.value}" if loaded
+                       else messages.getvalue().strip())
+            elif self.board is None:
+                report(line, "no game")
+            elif command == self.Commands.RESET.value:
+                self.reset_game()
+                log(command)
+                report(line, "ok")
+            elif command == self.Commands.SAVE.value and len(words) > 1:
+                path = original.split(maxsplit=1)[1]
+                log(f"{command} {path}")
+                with redirect_stdout(io.StringIO()) as messages:
+                    self.save_game(path)
+                report(line, messages.getvalue().strip())
+            elif command == self.Commands.QUIT.value:
+                break
+            elif command in moves and len(words) >= 2:
+                log(' '.join(words))
+                report(line, self.process_script_move(command, words[1:]))
+            elif command in (self.Commands.UNDO.value,
+                             self.Commands.REDO.value):
+                log(command)
+                with redirect_stdout(io.StringIO()) as messages:
+                    if command == self.Commands.UNDO.value:
+                        self.process_undo()
+                    else:
+                        self.process_redo()
+                report(line, messages.getvalue().strip() or
+                       f"ok {self.current_state.value}")
+            else:
+                report(line, "unknown command")
+
+        if self.board is not None:
+            self.display.display_board(self.board, self.mines_left)
+            print(f"State: {self.current_state.value}")
+
+    def run_script_new_game(self, words, log, report):
+        """
+        Starts the new game described by a "new width height mines [seed]
+        [win-rule=rule] [first-click=safe|unsafe]" script line. The options
+        carry over to the games after it and are always written to the log
+        so a replay plays by the same rules
+        """
+        line = ' '.join(words)
+        options = dict(word.split('=', 1) for word in words[1:]
+                       if '=' in word)
+        setup = [word for word in words[1:] if '=' not in word]
+        try:
+            width, height, num_mines = (int(word) for word in setup[:3])
+            seed = int(setup[3]) if len(setup) > 3 else None
+        except ValueError:
+            report(line, "invalid board setup")
+            return
+        win_rule = options.pop("win-rule", self.win_rule)
+        first_click = options.pop(
+            "first-click", "safe" if self.safe_first_click else "unsafe")
+        if options or win_rule not in WIN_RULES or \
+                first_click not in ("safe", "unsafe"):
+            report(line, "invalid option")
+            return
+        self.win_rule = win_rule
+        self.safe_first_click = first_click == "safe"
+
+        # the board setup errors are reported on the result line instead
+        with redirect_stdout(io.StringIO()):
+            self.build_new_game(width, height, num_mines, seed)
+        if self.board is None:
+            report(line, "invalid board setup")
+            return
+        log(f"new {width} {height} {num_mines} {self.board.seed} "
+            f"win-rule={win_rule} first-click={first_click}")
+        report(line, f"seed {self.board.seed}")
+
+    def process_script_move(self, command: str, moves: List[str]):
+        """
+        Applies one scripted command to one or more cells as a batch and
+        returns its result line
+        """
+        if self.current_state != State.PLAYING:
+            return "game over"
+        batch = self.parse_moves(command, moves)
+        if batch is None:
+            return "invalid move"
+
+        self.mode = command
+        self.changed_cells = set()
+        with redirect_stdout(io.StringIO()) as messages:
+            played = self.process_moves(batch)
+        # the moves of a batch that weren't allowed are reported before the
+        # result of the rest
+        lines = messages.getvalue().splitlines()
+        if not played:
+            return '; '.join(lines) or "ok"
+        if self.current_state == State.PLAYER_WON:
+            lines.append("won")
+        elif self.current_state == State.PLAYER_LOST:
+            lines.append("lost")
+        elif command in (self.Commands.REVEAL.value,
+                         self.Commands.CHORD.value):
+            lines.append(f"ok {len(self.changed_cells)} revealed")
+        else:
+            lines.append("ok")
+        return '; '.join(lines)
+
+    def process_playing(self):
+        """
+        Handles playing the game from getting input to displaying the board
+        """
+        self.display.display_board(self.board, self.mines_left,
+                                   self.changed_cells)
+        self.changed_cells = None
+        command = self.get_command()
+        self.process_command(command)
+
+    def process_new_game(self):
+        """
+        Handles prompting player for new game parameters and calling
+        build_new_game function
+        """
+        game_built = False
+        while not game_built:
+            print("Please enter the parameters for your new game board")
+            print("Default width: 9")
+            print("Default height: 9")
+            print("Default mine count: 10")
+            try:
+                width = int(input("Board width: "))
+                height = int(input("Board height: "))
+                num_mines = int(input("Number of mines: "))
+            except ValueError:
+                print("Starting game with default parameters")
+                width = DEFAULT_BOARD_WIDTH
+                height = DEFAULT_BOARD_HEIGHT
+                num_mines = DEFAULT_MINE_COUNT
+            no_guess = input("No guessing needed? (y/N): ").lower() == "y"
+            self.build_new_game(width, height, num_mines, no_guess=no_guess)
+            if self.board is not None:
+                game_built = True
+        self.current_state == State.PLAYING
+
+    def process_win(self):
+        """
+        Handles player winning the game
+        """
+        self.display.display_board(self.board, self.mines_left)
+        print("You Won!")
+        self.current_state = State.MENU
+
+    def process_loss(self):
+        """
+        Handles player losing the game
+        """
+        self.board.reveal_all_mines()
+        self.display.display_board(self.board, self.mines_left)
+        print("You Loss!")
+        self.current_state = State.MENU
+
+    def process_menu(self):
+        """
+        Handles all menu stuff for player
+        """
+        print("Start a new game or quit?")
+        while self.current_state == State.MENU:
+            command = input("Enter command (new, load, undo, quit): ")
+            if command == self.Commands.NEW.value or not command:
+                self.current_state = State.NEW_GAME
+            elif command == self.Commands.LOAD.value:
+                self.load_game(input("Load from file: "))
+            # the move that ended the game can be taken back to carry on
+            elif command == self.Commands.UNDO.value:
+                self.process_undo()
+            elif command == self.Commands.QUIT.value:
+                self.current_state = State.PLAYER_QUIT
+
+    def process_quit(self):
+        """
+        Handles player quiting the game
+        """
+        self.display.restore_terminal()
+        if self.factory is not None:
+            self.factory.close()
+        if self.instrumentation is not None:
+            self.instrumentation.finish()
+        print("Thanks for playing!")
+
+
+def undo_limit(value):
+    """
+    Returns the Journal limit for an --undo-limit value, None for -1 which
+    keeps every move. Raises argparse.ArgumentTypeError if it isn't a whole
+    number of -1 or more
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < -1:
+        raise argparse.ArgumentTypeError(f"must be -1 or more: {value}")
+    return None if number == -1 else number
+
+
+if __name__ == "__main__":
+    from instrumentation import PROFILE_ENV, Instrumentation
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ansi", action="store_true",
+                        help="redraw only the cells that change in place")
+    parser.add_argument("--script",
+                        help="file of commands to play without prompting, "
+                             "- reads them from stdin")
+    parser.add_argument("--replay-log",
+                        help="file to write the commands of a scripted game "
+                             "to so it can be replayed")
+    parser.add_argument("--seed", type=int,
+                        help="seed of the board a script starts with")
+    parser.add_argument("--verbose", action="store_true",
+                        help="print a result line for every scripted "
+                             "command")
+    parser.add_argument("--bitboard", action="store_true",
+                        help="keep the board as integer bit masks")
+    parser.add_argument("--win-rule", choices=WIN_RULES, default=WIN_BY_EITHER,
+                        help="win by flagging every mine, by revealing every "
+                             "other cell or by either")
+    parser.add_argument("--unsafe-first-click", action="store_true",
+                        help="leave the mines where they are on the first "
+                             "reveal")
+    parser.add_argument("--undo-limit", type=undo_limit,
+                        default=DEFAULT_JOURNAL_LIMIT,
+                        help="moves that can be undone, 0 turns undo off "
+                             "and -1 keeps every move")
+    parser.add_argument("--instrument", action="store_true",
+                        help="print call counts and timings of the hot "
+                             "paths on quit, also turned on by setting "
+                             "EXPLODEY_INSTRUMENT=1")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="write cProfile stats of the session to FILE, "
+                             "also set by EXPLODEY_PROFILE")
+    args = parser.parse_args()
+
+    board_class = BitBoard if args.bitboard else Board
+    game = Controller(display=Display(ansi=args.ansi),
+                      board_class=board_class,
+                      win_rule=args.win_rule,
+                      safe_first_click=not args.unsafe_first_click,
+                      undo_limit=args.undo_limit)
+    profile_path = args.profile or os.environ.get(PROFILE_ENV)
+    if Instrumentation.requested(args.instrument) or profile_path:
+        game.instrumentation = Instrumentation(profile_path)
+        game.instrumentation.enable(Controller, Game, (Board, BitBoard),
+                                    Display)
+    if args.script is None:
+        # boards for the default setup are built while the menu is showing
+        game.factory = BoardFactory(board_class)
+        game.factory.prefetch(DEFAULT_BOARD_WIDTH, DEFAULT_BOARD_HEIGHT,
+                              DEFAULT_MINE_COUNT)
+        game.run()
+    else:
+        script = sys.stdin if args.script == '-' else open(args.script)
+        replay_log = open(args.replay_log, 'w') if args.replay_log else None
+        with script:
+            game.run_script(script.read().splitlines(), replay_log,
+                            args.verbose, args.seed)
+        if game.instrumentation is not None:
+            game.instrumentation.finish()
+        if replay_log is not None:
+            replay_log.close()
@@ -0,0 +1,412 @@
+"""
+Plays explodey sweeper on a board without edges.
+
+The plane is split into square chunks. The mines of a chunk come from the
+seed of the board and the coordinates of the chunk, so a chunk is only
+generated the first time a cell in it is looked at and comes out the same
+every time. Only the most recently used chunks are kept in memory, chunks
+that weren't changed are simply generated again when they're needed and
+the cells of changed ones are written compressed to an SQLite file on disk
+until then, so memory stays the same however far the player goes.
+
+Moves are entered as a command followed by the x and y of the cell, for
+example "reveal 10 -3", and "view x y" moves the part of the board that is
+drawn.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import zlib
+
+from explodey_sweeper import (
+    FLAGGED,
+    MINE_VALUE,
+    REVEALED,
+    STATE_CHARACTERS,
+    adjacent_cells,
+)
+
+CHUNK_SIZE = 32
+DEFAULT_DENSITY = 0.15
+# Below this density empty regions can go on forever, so a single reveal
+# would never finish
+MIN_DENSITY = 0.12
+MAX_DENSITY = 0.5
+# Chunks kept in memory before the least recently used one is dropped
+DEFAULT_MAX_CHUNKS = 256
+# Most cells a single reveal will open. The cells at the edge of a larger
+# opening are left hidden for the player to carry on from
+REVEAL_LIMIT = 100000
+
+VIEW_WIDTH = 40
+VIEW_HEIGHT = 20
+
+
+@dataclass
+class Chunk():
+    """
+    The cells of one chunk:
+    counts: bytearray holding the number of mines adjacent to each cell
+        or MINE_VALUE for cells that contain a mine, indexed y*size+x
+        within the chunk
+    states: bytearray holding the REVEALED and FLAGGED bits of each cell
+    changed: True once any of the states have been set since the chunk
+        was generated or loaded from disk
+    """
+    counts: bytearray
+    states: bytearray
+    changed: bool = field(default=False)
+
+
+@dataclass
+class InfiniteBoard():
+    """
+    A board without edges made of chunks that are generated on demand:
+    seed: integer every chunk is generated from
+    density: fraction of the cells that contain a mine
+    chunk_size: width and height of every chunk
+    max_chunks: number of chunks kept in memory
+    chunks: the chunks in memory keyed by chunk coordinates, least
+        recently used first
+    save_path: SQLite file the zlib compressed states of changed chunks
+        are written to when they are dropped from memory. A temporary file
+        that is deleted by close() is used when it isn't provided, a file
+        that is provided can be opened again to carry on the same board
+    """
+    seed: int = field(default_factory=lambda: random.getrandbits(32))
+    density: float = field(default=DEFAULT_DENSITY)
+    chunk_size: int = field(default=CHUNK_SIZE)
+    max_chunks: int = field(default=DEFAULT_MAX_CHUNKS)
+    chunks: Dict[Tuple[int, int], Chunk] = field(default_factory=OrderedDict,
+                                                 repr=False)
+    save_path: Optional[str] = field(default=None)
+
+    def __post_init__(self):
+        if not MIN_DENSITY <= self.density <= MAX_DENSITY:
+            raise ValueError(f"density must be between {MIN_DENSITY} and "
+                             f"{MAX_DENSITY}")
+        # chunks hold at least a 3x3 block of cells so a cell's neighbours
+        # are never more than one chunk away
+        self.chunk_size = max(self.chunk_size, 3)
+        self.max_chunks = max(self.max_chunks, 9)
+
+        self._temporary = self.save_path is None
+        if self._temporary:
+            handle, self.save_path = tempfile.mkstemp(
+                prefix="explodey-chunks-", suffix=".sqlite3")
+            os.close(handle)
+        self._store = sqlite3.connect(self.save_path)
+        # the file only holds states that can be played again, losing the
+        # last writes in a crash isn't worth waiting on the disk for
+        self._store.execute("PRAGMA synchronous = OFF")
+        self._store.execute("CREATE TABLE IF NOT EXISTS board "
+                            "(seed INTEGER, density REAL, chunk_size "
+                            "INTEGER)")
+        self._store.execute("CREATE TABLE IF NOT EXISTS chunks "
+                            "(x INTEGER, y INTEGER, states BLOB, "
+                            "PRIMARY KEY (x, y))")
+        setup = (self.seed, self.density, self.chunk_size)
+        saved_setup = self._store.execute("SELECT * FROM board").fetchone()
+        if saved_setup is None:
+            self._store.execute("INSERT INTO board VALUES (?, ?, ?)", setup)
+            self._store.commit()
+        elif saved_setup != setup:
+            self.close()
+            raise ValueError(f"{self.save_path} holds a board with another "
+                             f"seed, density or chunk size")
+
+    def close(self):
+        """
+        Closes the save file, deleting it if it was a temporary one
+        """
+        self._store.close()
+        if self._temporary and os.path.exists(self.save_path):
+            os.remove(self.save_path)
+
+    def save(self):
+        """
+        Writes every changed chunk in memory to the save file
+        """
+        for key, chunk in self.chunks.items():
+            if chunk.changed:
+                self.save_chunk(key, chunk)
+        self._store.commit()
+
+    def save_chunk(self, key, chunk: Chunk):
+        """
+        Writes the compressed states of a chunk to the save file
+        """
+        self._store.execute("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?)",
+                            (*key, zlib.compress(bytes(chunk.states))))
+        chunk.changed = False
+
+    def saved_states(self, key):
+        """
+        Returns the states of the chunk from the save file or None if they
+        were never saved
+        """
+        row = self._store.execute(
+            "SELECT states FROM chunks WHERE x = ? AND y = ?", key
+        ).fetchone()
+        return bytearray(zlib.decompress(row[0])) if row else None
+
+    def chunk_mines(self, chunk_x, chunk_y):
+        """
+        Returns the indices within the chunk of every mine in it
+        """
+        size = self.chunk_size
+        rng = random.Random(f"{self.seed}:{chunk_x}:{chunk_y}")
+        return rng.sample(range(size * size), round(size * size *
+                                                    self.density))
+
+    def generate_chunk(self, chunk_x, chunk_y):
+        """
+        Returns the counts of every cell of the chunk. The mines of the
+        chunks around it are generated as well for the cells on its edges
+        """
+        size = self.chunk_size
+        padded = size + 2
+        # mines of this chunk and the one cell wide border around it
+        mines = bytearray(padded * padded)
+        for offset_y in (-1, 0, 1):
+            for offset_x in (-1, 0, 1):
+                for index in self.chunk_mines(chunk_x + offset_x,
+                                              chunk_y + offset_y):
+                    x = index % size + offset_x * size + 1
+                    y = index // size + offset_y * size + 1
+                    if 0 <= x < padded and 0 <= y < padded:
+                        mines[y*padded+x] = 1
+
+        counts = bytearray(size * size)
+        for y in range(size):
+            for x in range(size):
+                center = (y + 1)*padded + x + 1
+                if mines[center]:
+                    counts[y*size+x] = MINE_VALUE
+                else:
+                    counts[y*size+x] = sum(
+                        mines[center + y_offset*padded + x_offset]
+                        for x_offset, y_offset in adjacent_cells
+                    )
+        return counts
+
+    def chunk(self, chunk_x, chunk_y):
+        """
+        Returns the chunk at the provided chunk coordinates, generating it
+        or reading its saved states back if it isn't in memory
+        """
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        counts = self.generate_chunk(chunk_x, chunk_y)
+        states = self.saved_states(key)
+        if states is None:
+            states = bytearray(len(counts))
+        chunk = Chunk(counts, states)
+        self.chunks[key] = chunk
+
+        # drop the least recently used chunk, only the states of chunks
+        # changed since they were last saved have to be written since the
+        # counts can be generated again
+        if len(self.chunks) > self.max_chunks:
+            old_key, old_chunk = self.chunks.popitem(last=False)
+            if old_chunk.changed:
+                self.save_chunk(old_key, old_chunk)
+                self._store.commit()
+        return chunk
+
+    def locate(self, x, y):
+        """
+        Returns the chunk holding the cell at (x, y) and the index of the
+        cell within it
+        """
+        size = self.chunk_size
+        return (self.chunk(x // size, y // size),
+                (y % size)*size + x % size)
+
+    def count(self, x, y):
+        """
+        returns the number of mines adjacent to the cell at (x, y) or
+        MINE_VALUE if it contains a mine
+        """
+        chunk, index = self.locate(x, y)
+        return chunk.counts[index]
+
+    def is_mine(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) contains a mine
+        """
+        return self.count(x, y) == MINE_VALUE
+
+    def cell_state(self, x, y):
+        """
+        returns the REVEALED and FLAGGED bits of the cell at (x, y)
+        """
+        chunk, index = self.locate(x, y)
+        return chunk.states[index]
+
+    def set_cell_state(self, x, y, state):
+        """
+        sets the REVEALED and FLAGGED bits of the cell at (x, y)
+        """
+        chunk, index = self.locate(x, y)
+        chunk.states[index] = state
+        chunk.changed = True
+
+    def is_revealed(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) is revealed
+        """
+        return bool(self.cell_state(x, y) & REVEALED)
+
+    def is_flagged(self, x, y):
+        """
+        Returns True or False depending on if the cell is flagged
+        """
+        return bool(self.cell_state(x, y) & FLAGGED)
+
+    def flag_cell(self, x, y):
+        """
+        Flags the cell at (x, y)
+        """
+        self.set_cell_state(x, y, self.cell_state(x, y) | FLAGGED)
+
+    def unflag_cell(self, x, y):
+        """
+        Unflags the cell at (x, y)
+        """
+        self.set_cell_state(x, y, self.cell_state(x, y) & ~FLAGGED)
+
+    def reveal_cell(self, x, y):
+        """
+        Reveals the cell at (x, y), and every cell around it if it is
+        empty, and returns the set of (x, y) positions that were newly
+        revealed. The fill crosses chunk edges like any other cell and
+        stops after REVEAL_LIMIT cells
+        """
+        state = self.cell_state(x, y)
+        if state & REVEALED:
+            return set()
+        self.set_cell_state(x, y, state | REVEALED)
+        revealed = {(x, y)}
+        if self.count(x, y) != 0:
+            return revealed
+
+        next_cells = [(x, y)]
+        while next_cells and len(revealed) < REVEAL_LIMIT:
+            center_x, center_y = next_cells.pop()
+            for x_offset, y_offset in adjacent_cells:
+                x = center_x + x_offset
+                y = center_y + y_offset
+                # the chunk is looked up for every cell since looking up
+                # another chunk can drop the one from the cell before
+                chunk, index = self.locate(x, y)
+                state = chunk.states[index]
+                count = chunk.counts[index]
+                # flagged cells are left hidden, so a flagged empty cell
+                # doesn't spread the fill either
+                if state & (REVEALED | FLAGGED) or count == MINE_VALUE:
+                    continue
+                chunk.states[index] = state | REVEALED
+                chunk.changed = True
+                revealed.add((x, y))
+                if count == 0:
+                    next_cells.append((x, y))
+        return revealed
+
+    def rows(self, left, top, width, height):
+        """
+        Returns the lines drawing the cells from (left, top) across and
+        down, with the x of each column and the y of each row
+        """
+        lines = [' ' * 6 + ''.join(str(x % 10)
+                                   for x in range(left, left + width))]
+        for y in range(top, top + height):
+            lines.append(f"{y:>5} " + ''.join(
+                STATE_CHARACTERS[self.cell_state(x, y)][self.count(x, y)]
+                for x in range(left, left + width)
+            ))
+        return lines
+
+
+def play(board: InfiniteBoard):
+    """
+    Plays the board from the terminal until the player quits or loses
+    """
+    left, top = -VIEW_WIDTH // 2, -VIEW_HEIGHT // 2
+    revealed_cells = 0
+    while True:
+        print('\n'.join(board.rows(left, top, VIEW_WIDTH, VIEW_HEIGHT)))
+        print(f"Seed: {board.seed}  Cells revealed: {revealed_cells}  "
+              f"Chunks in memory: {len(board.chunks)}")
+        words = input("Command (reveal x y, flag x y, unflag x y, view x y, "
+                      "quit): ").lower().split()
+        if words and words[0] == "quit":
+            break
+        try:
+            command = words[0]
+            x, y = int(words[1]), int(words[2])
+        except (IndexError, ValueError):
+            print("Invalid command")
+            continue
+
+        if command == "view":
+            left, top = x - VIEW_WIDTH // 2, y - VIEW_HEIGHT // 2
+        elif command == "reveal" and not board.is_flagged(x, y):
+            if board.is_mine(x, y):
+                board.set_cell_state(x, y, board.cell_state(x, y) | REVEALED)
+                print('\n'.join(board.rows(left, top, VIEW_WIDTH,
+                                           VIEW_HEIGHT)))
+                print(f"You Loss! Cells revealed: {revealed_cells}")
+                break
+            revealed_cells += len(board.reveal_cell(x, y))
+        elif command == "flag" and not board.is_revealed(x, y):
+            board.flag_cell(x, y)
+        elif command == "unflag":
+            board.unflag_cell(x, y)
+        else:
+            print("Invalid command")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY,
+                        help="fraction of the cells that contain a mine")
+    parser.add_argument("--max-chunks", type=int, default=DEFAULT_MAX_CHUNKS,
+                        help="chunks kept in memory")
+    parser.add_argument("--save-file",
+                        help="SQLite file to keep the board in so it can be "
+                             "carried on later, a temporary file is used "
+                             "otherwise")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+    try:
+        board = InfiniteBoard(seed=seed, density=args.density,
+                              max_chunks=args.max_chunks,
+                              save_path=args.save_file)
+    except ValueError as error:
+        print(error)
+        return
+    try:
+        play(board)
+    finally:
+        board.save()
+        board.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Counts the calls to the hot paths of the game and how long they take.
+
+Nothing is measured until Instrumentation.enable() wraps the methods of
+the classes it is handed, so a game that doesn't turn it on runs the
+original methods without any overhead. The classes are passed in rather
+than imported so the game can instrument its own classes even when it
+is run as a script.
+"""
+
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, TextIO
+import cProfile
+import os
+import sys
+import time
+
+# Setting this environment variable to anything but 0 turns instrumentation
+# on without the command line flag
+INSTRUMENT_ENV = "EXPLODEY_INSTRUMENT"
+# File to write cProfile stats to when the game quits
+PROFILE_ENV = "EXPLODEY_PROFILE"
+
+# Histogram bucket i counts values from 2**(i-1) up to 2**i, bucket 0 the
+# values under 1 and the last bucket everything larger
+BUCKETS = 32
+
+# (method name, record the size of the returned collection) instrumented
+# on each class
+CONTROLLER_METHODS = (("process_moves", False),)
+GAME_METHODS = (("apply_moves", False), ("check_win", False))
+BOARD_METHODS = (("reveal_cell", True), ("reveal_cells", True),
+                 ("fill_board_with_numbers", False))
+DISPLAY_METHODS = (("display_board", False),)
+
+
+@dataclass
+class Histogram():
+    """
+    Counts of values in power of two buckets
+    """
+    buckets: List[int] = field(default_factory=lambda: [0] * BUCKETS)
+
+    def add(self, value):
+        self.buckets[min(int(value).bit_length(), BUCKETS - 1)] += 1
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the provided fraction
+        of the values
+        """
+        target = sum(self.buckets) * fraction
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= target:
+                return 1 << bucket
+        return 0
+
+    def describe(self, unit):
+        """
+        Returns the non-empty buckets as "<bound:count" words
+        """
+        return ' '.join(f"<{1 << bucket}{unit}:{count}"
+                        for bucket, count in enumerate(self.buckets)
+                        if count)
+
+
+@dataclass
+class MethodStats():
+    """
+    Measurements of one method:
+    calls: number of calls
+    nanoseconds: total time spent in the method
+    latency: Histogram of the microseconds each call took
+    sizes: Histogram of the size of what each call returned, for methods
+        that return the cells they changed
+    """
+    calls: int = field(default=0)
+    nanoseconds: int = field(default=0)
+    latency: Histogram = field(default_factory=Histogram)
+    sizes: Optional[Histogram] = field(default=None)
+
+    def summary(self, name):
+        """
+        Returns the lines describing the method
+        """
+        mean = self.nanoseconds / self.calls / 1000 if self.calls else 0
+        lines = [
+            f"{name}: {self.calls} calls, "
+            f"{self.nanoseconds / 1e6:.3f} ms total, {mean:.1f} us mean, "
+            f"p50 <{self.latency.percentile(0.5)} us, "
+            f"p99 <{self.latency.percentile(0.99)} us",
+            f"  latency {self.latency.describe('us')}",
+        ]
+        if self.sizes is not None:
+            lines.append(f"  cells {self.sizes.describe('')}")
+        return lines
+
+
+class Instrumentation():
+    """
+    Wraps the hot paths of the game to measure them and optionally runs
+    cProfile over the whole session:
+    stats: MethodStats of every wrapped method by "Class.method" name
+    profile_path: file the cProfile stats are written to, None to not
+        profile
+    """
+
+    def __init__(self, profile_path: Optional[str] = None):
+        self.stats: Dict[str, MethodStats] = {}
+        self.profile_path = profile_path
+        self._profiler: Optional[cProfile.Profile] = None
+        self._originals = []
+
+    @staticmethod
+    def requested(flag=False):
+        """
+        Returns True if the flag is set or the environment asks for
+        instrumentation
+        """
+        return flag or os.environ.get(INSTRUMENT_ENV, "0") not in ("", "0")
+
+    def instrument(self, cls, name, count_result=False):
+        """
+        Replaces cls.name with a wrapper that measures every call. Methods
+        that cls only inherits are left alone, they are measured on the
+        class they're defined on
+        """
+        original = cls.__dict__.get(name)
+        if original is None:
+            return
+        stats = self.stats.setdefault(f"{cls.__name__}.{name}",
+                                      MethodStats())
+        if count_result:
+            stats.sizes = Histogram()
+        perf_counter_ns = time.perf_counter_ns
+
+        @wraps(original)
+        def measured(*args, **kwargs):
+            start = perf_counter_ns()
+            result = original(*args, **kwargs)
+            elapsed = perf_counter_ns() - start
+            stats.calls += 1
+            stats.nanoseconds += elapsed
+            stats.latency.add(elapsed // 1000)
+            if count_result:
+                stats.sizes.add(len(result))
+            return result
+
+        self._originals.append((cls, name, original))
+        setattr(cls, name, measured)
+
+    def enable(self, controller_class, game_class,
+               board_classes: Iterable[type], display_class):
+        """
+        Starts measuring the game's classes and profiling if a profile
+        path was provided
+        """
+        for name, count_result in CONTROLLER_METHODS:
+            self.instrument(controller_class, name, count_result)
+        for name, count_result in GAME_METHODS:
+            self.instrument(game_class, name, count_result)
+        for board_class in board_classes:
+            for name, count_result in BOARD_METHODS:
+                self.instrument(board_class, name, count_result)
+        for name, count_result in DISPLAY_METHODS:
+            self.instrument(display_class, name, count_result)
+        if self.profile_path:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def disable(self):
+        """
+        Puts the original methods back and stops profiling
+        """
+        for cls, name, original in reversed(self._originals):
+            setattr(cls, name, original)
+        self._originals = []
+        if self._profiler is not None:
+            self._profiler.disable()
+
+    def summary(self):
+        """
+        Returns the lines describing every method that was called
+        """
+        lines = ["Instrumentation summary:"]
+        for name, stats in sorted(self.stats.items()):
+            if stats.calls:
+                lines.extend(stats.summary(name))
+        return lines
+
+    def finish(self, stream: TextIO = sys.stdout):
+        """
+        Stops measuring, writes the summary to the stream and the cProfile
+        stats to profile_path
+        """
+        self.disable()
+        stream.write('\n'.join(self.summary()) + '\n')
+        if self._profiler is not None:
+            self._profiler.dump_stats(self.profile_path)
+            stream.write(f"Profile written to {self.profile_path}\n")
+            self._profiler = None
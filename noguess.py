@@ -0,0 +1,260 @@
+"""
+Generates boards that can be solved from their start cell without ever
+having to guess and keeps them in an on-disk cache.
+
+A candidate board is built from a seed, the mines around the center cell
+are moved away the same way they are on a first click and the solver plays
+from there only making moves that are certain. Boards it clears are kept.
+A board is stored as its seed and start cell, so a cache file holds one
+"seed x y" line per board, and the whole board can be rebuilt from that.
+"""
+
+from contextlib import closing
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+import argparse
+import itertools
+import os
+import random
+import time
+
+from explodey_sweeper import (
+    DEFAULT_BOARD_HEIGHT,
+    DEFAULT_BOARD_WIDTH,
+    DEFAULT_MINE_COUNT,
+    Board,
+)
+from parallel import map_in_order
+from solver import REVEAL, Solver
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache",
+                                 "explodey_sweeper", "noguess")
+# Bytes the cache can take up before the least recently used setups are
+# dropped, around 50000 boards
+DEFAULT_MAX_BYTES = 1 << 20
+# Boards kept for each setup
+DEFAULT_BOARDS_PER_SETUP = 1000
+
+# Seeds a worker process tries before reporting back
+CHUNK_SIZE = 64
+
+# (seed, start_x, start_y) of a board that can be solved without guessing
+Entry = Tuple[int, int, int]
+
+
+def start_cell(width, height):
+    """
+    Returns the (x, y) every no-guess board of the provided size is solved
+    from
+    """
+    return width // 2, height // 2
+
+
+def build_board(width, height, mines, entry: Entry, board_class=Board):
+    """
+    Rebuilds the board of a cache entry with the mines around its start
+    cell moved away. The start cell still has to be revealed
+    """
+    seed, x, y = entry
+    board = board_class(width=width, height=height, number_of_mines=mines,
+                        seed=seed)
+    board.clear_first_click(x, y)
+    return board
+
+
+def solves_without_guessing(board: Board, x, y):
+    """
+    Returns True if the solver can clear the board starting from (x, y)
+    using only moves that are certain. The board is played out
+    """
+    solver = Solver(board)
+    revealed = board.reveal_cell(x, y)
+    while not board.all_safe_cells_revealed():
+        solver.update(revealed)
+        safe = [(x, y) for command, x, y in solver.moves()
+                if command == REVEAL]
+        if not safe:
+            return False
+        revealed = board.reveal_cells(safe)
+    return True
+
+
+def _search(width, height, mines, seeds) -> List[Entry]:
+    """
+    Tries a chunk of seeds inside a worker process and returns the entries
+    of the ones that can be solved without guessing
+    """
+    x, y = start_cell(width, height)
+    return [(seed, x, y) for seed in seeds
+            if solves_without_guessing(
+                build_board(width, height, mines, (seed, x, y)), x, y)]
+
+
+@dataclass
+class GenerationReport():
+    """
+    Totals for one run of the generator. entries holds every board found,
+    which can be more than the count that was asked for, or fewer when the
+    time limit ran out first
+    """
+    entries: List[Entry] = field(default_factory=list)
+    accepted: int = field(default=0)
+    attempts: int = field(default=0)
+    seconds: float = field(default=0.0)
+    workers: int = field(default=1)
+
+    @property
+    def acceptance_rate(self):
+        return self.accepted / self.attempts if self.attempts else 0.0
+
+    @property
+    def boards_per_second_per_core(self):
+        if not self.seconds:
+            return 0.0
+        return self.accepted / self.seconds / self.workers
+
+
+def generate(width, height, mines, count, workers=None,
+             seed: Optional[int] = None,
+             time_limit: Optional[float] = None) -> GenerationReport:
+    """
+    Searches seeds across a pool of worker processes until count no-guess
+    boards are found or time_limit seconds have gone by. Dense setups can
+    have no boards at all, so callers that have to finish should pass a
+    time limit. Seeds are tried in order from seed, a random starting seed
+    is picked when it isn't provided
+    """
+    workers = workers or os.cpu_count() or 1
+    seed = seed if seed is not None else random.getrandbits(32)
+    report = GenerationReport(workers=workers)
+    start = time.perf_counter()
+    tasks = ((width, height, mines, range(first, first + CHUNK_SIZE))
+             for first in itertools.count(seed, CHUNK_SIZE))
+    with closing(map_in_order(_search, tasks, workers)) as results:
+        for entries in results:
+            report.entries.extend(entries)
+            report.attempts += CHUNK_SIZE
+            if len(report.entries) >= count or (
+                    time_limit is not None and
+                    time.perf_counter() - start > time_limit):
+                break
+    report.accepted = len(report.entries)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+@dataclass
+class NoGuessCache():
+    """
+    No-guess boards stored on disk, one file of "seed x y" lines for each
+    (width, height, mines) setup:
+    directory: where the files are kept
+    max_bytes: size of all of the files together before the files of the
+        setups used least recently are deleted
+    boards_per_setup: most boards kept for one setup
+    """
+    directory: str = field(default=DEFAULT_CACHE_DIR)
+    max_bytes: int = field(default=DEFAULT_MAX_BYTES)
+    boards_per_setup: int = field(default=DEFAULT_BOARDS_PER_SETUP)
+
+    def path(self, width, height, mines):
+        return os.path.join(self.directory, f"{width}x{height}x{mines}.txt")
+
+    def read(self, width, height, mines) -> List[Entry]:
+        """
+        Returns every entry cached for the setup
+        """
+        try:
+            with open(self.path(width, height, mines)) as cache_file:
+                return [tuple(int(word) for word in line.split())
+                        for line in cache_file if line.strip()]
+        except (OSError, ValueError):
+            return []
+
+    def write(self, width, height, mines, entries: List[Entry]):
+        """
+        Replaces the entries cached for the setup
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(width, height, mines)
+        with open(path + ".tmp", 'w') as cache_file:
+            cache_file.writelines(f"{seed} {x} {y}\n"
+                                  for seed, x, y in entries)
+        os.replace(path + ".tmp", path)
+
+    def add(self, width, height, mines, entries: List[Entry]):
+        """
+        Adds entries to the setup, dropping its oldest ones past
+        boards_per_setup, then keeps the cache under max_bytes
+        """
+        cached = self.read(width, height, mines) + list(entries)
+        self.write(width, height, mines, cached[-self.boards_per_setup:])
+        self.evict(keep=self.path(width, height, mines))
+
+    def take(self, width, height, mines) -> Optional[Entry]:
+        """
+        Removes and returns one entry for the setup or None if there
+        aren't any
+        """
+        cached = self.read(width, height, mines)
+        if not cached:
+            return None
+        entry = cached.pop()
+        self.write(width, height, mines, cached)
+        return entry
+
+    def evict(self, keep=None):
+        """
+        Deletes the files of the setups used least recently until the
+        cache fits in max_bytes. The file keep is never deleted
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        files = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            if name.endswith(".txt") and path != keep:
+                status = os.stat(path)
+                files.append((status.st_mtime, status.st_size, path))
+        total = sum(size for _, size, _ in files)
+        if keep is not None and os.path.exists(keep):
+            total += os.path.getsize(keep)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--width", type=int, default=DEFAULT_BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_BOARD_HEIGHT)
+    parser.add_argument("--mines", type=int, default=DEFAULT_MINE_COUNT)
+    parser.add_argument("--count", type=int, default=100,
+                        help="number of no-guess boards to generate")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="first seed to try")
+    parser.add_argument("--time-limit", type=float, default=None,
+                        help="seconds to search for before giving up")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES)
+    args = parser.parse_args()
+
+    report = generate(args.width, args.height, args.mines, args.count,
+                      args.workers, args.seed, args.time_limit)
+    cache = NoGuessCache(args.cache_dir, args.max_bytes)
+    cache.add(args.width, args.height, args.mines, report.entries)
+    print(f"Boards: {report.accepted} of {report.attempts} tried "
+          f"({report.acceptance_rate:.1%}) in {report.seconds:.2f}s")
+    print(f"Throughput: {report.boards_per_second_per_core:.1f} boards/s "
+          f"per core on {report.workers} workers")
+    print(f"Cached for {args.width}x{args.height}/{args.mines}: "
+          f"{len(cache.read(args.width, args.height, args.mines))}")
+
+
+if __name__ == "__main__":
+    main()
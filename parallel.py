@@ -0,0 +1,37 @@
+"""
+Runs tasks across a pool of worker processes and hands back their results
+in order.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator
+import itertools
+import os
+
+
+def map_in_order(function: Callable, tasks: Iterable[tuple],
+                 workers=None) -> Iterator:
+    """
+    Yields function(*task) for every task in the order of the tasks, run
+    across a pool of worker processes. Only a couple of tasks per worker
+    are in flight at once so every core stays busy without every task being
+    queued up, which lets tasks be an endless iterator. Tasks that haven't
+    started are cancelled when the caller stops early
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(function, *task)
+                        for task in itertools.islice(tasks, workers * 2))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                # the next task is sent before the result is handed back so
+                # the workers carry on while the caller uses it
+                for task in itertools.islice(tasks, 1):
+                    pending.append(pool.submit(function, *task))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,268 @@
+"""
+Works out the exact chance that each hidden cell on a Board is a mine
+"""
+
+from dataclasses import dataclass, field
+from functools import lru_cache
+from math import comb
+from typing import Dict, List, Optional, Tuple
+
+from explodey_sweeper import FLAGGED, REVEALED, Board
+from solver import Solver
+
+# A constraint is a tuple of the cell indices around a number and how many
+# mines are hidden among them
+Constraint = Tuple[Tuple[int, ...], int]
+
+
+@dataclass
+class Heatmap():
+    """
+    The chance of each hidden cell being a mine:
+    width: width of the board the heatmap was built for
+    cells: probability for each cell index next to a revealed number or
+        already known to be safe or a mine
+    elsewhere: probability shared by every other hidden cell
+    """
+    width: int
+    cells: Dict[int, float] = field(default_factory=dict)
+    elsewhere: float = field(default=0.0)
+
+    def probability(self, x, y):
+        """
+        Returns the chance that the hidden cell at (x, y) is a mine
+        """
+        return self.cells.get(y*self.width+x, self.elsewhere)
+
+
+@lru_cache(maxsize=4096)
+def count_component(constraints: Tuple[Constraint, ...]):
+    """
+    Counts every way mines can be placed in one group of cells linked by
+    the provided constraints. Returns the cells and a dict mapping the
+    number of mines used to the number of placements and how many of those
+    placements put a mine in each cell.
+
+    Cells are visited in the order they are reached through the
+    constraints, so only a few constraints are open at any time. Placements
+    are memoized on the mines placed in those open constraints, which keeps
+    long frontiers polynomial instead of exponential
+    """
+    # order the cells so neighbouring constraints close close together
+    cell_constraints: Dict[int, List[int]] = {}
+    for number, (cells, _) in enumerate(constraints):
+        for cell in cells:
+            cell_constraints.setdefault(cell, []).append(number)
+    cells: List[int] = []
+    seen = set()
+    for start in sorted(cell_constraints):
+        if start in seen:
+            continue
+        seen.add(start)
+        queue = [start]
+        while queue:
+            cell = queue.pop(0)
+            cells.append(cell)
+            for number in cell_constraints[cell]:
+                for other in constraints[number][0]:
+                    if other not in seen:
+                        seen.add(other)
+                        queue.append(other)
+    position = {cell: depth for depth, cell in enumerate(cells)}
+
+    # for every depth, the constraints touching that cell along with how
+    # many of their cells come later, and the constraints left open
+    checks: List[List[Tuple[int, int]]] = [[] for _ in cells]
+    first = [len(cells)] * len(constraints)
+    last = [-1] * len(constraints)
+    for number, (constraint_cells, _) in enumerate(constraints):
+        depths = sorted(position[cell] for cell in constraint_cells)
+        first[number] = depths[0]
+        last[number] = depths[-1]
+        for after, depth in enumerate(reversed(depths)):
+            checks[depth].append((number, after))
+    open_at = [
+        tuple(number for number in range(len(constraints))
+              if first[number] < depth <= last[number])
+        for depth in range(len(cells))
+    ]
+    mines = [constraint[1] for constraint in constraints]
+    placed = [0] * len(constraints)
+    memo = {}
+
+    def place(depth):
+        if depth == len(cells):
+            return {0: (1, ())}
+        key = (depth, tuple(placed[number] for number in open_at[depth]))
+        if key in memo:
+            return memo[key]
+
+        result = {}
+        for value in (0, 1):
+            if any(placed[number] + value > mines[number] or
+                   placed[number] + value + after < mines[number]
+                   for number, after in checks[depth]):
+                continue
+            for number, _ in checks[depth]:
+                placed[number] += value
+            rest = place(depth + 1)
+            for number, _ in checks[depth]:
+                placed[number] -= value
+
+            for used, (ways, counts) in rest.items():
+                counts = (ways * value,) + counts
+                if used + value in result:
+                    total_ways, total_counts = result[used + value]
+                    ways += total_ways
+                    counts = tuple(a + b for a, b in zip(counts, total_counts))
+                result[used + value] = (ways, counts)
+        memo[key] = result
+        return result
+
+    return tuple(cells), place(0)
+
+
+def convolve(left: Dict[int, int], right: Dict[int, int]):
+    """
+    Combines two mines used -> ways dicts of independent groups of cells
+    """
+    result: Dict[int, int] = {}
+    for left_mines, left_ways in left.items():
+        for right_mines, right_ways in right.items():
+            mines = left_mines + right_mines
+            result[mines] = result.get(mines, 0) + left_ways * right_ways
+    return result
+
+
+class ProbabilityEngine():
+    """
+    Builds Heatmaps for a Board. Cells the solver has already proven safe
+    or mines are taken as known, the rest of the frontier is split into
+    groups of cells that don't share any numbers and each group is counted
+    on its own. Group counts are cached by their constraints, so after a
+    reveal only the groups it touched are counted again
+    """
+
+    def __init__(self, board: Board, solver: Optional[Solver] = None):
+        self.board = board
+        self.solver = solver if solver is not None else Solver(board)
+
+    def update(self, revealed):
+        """
+        Updates the frontier with the (x, y) cells that were just revealed
+        """
+        self.solver.update(revealed)
+
+    def components(self) -> List[Tuple[Constraint, ...]]:
+        """
+        Splits the constraints of the frontier into groups that don't share
+        any cells
+        """
+        solver = self.solver
+        solver.deduce()
+        constraints: List[Constraint] = []
+        for index in solver.frontier:
+            unknown, mines_left = solver.constraint(index)
+            if unknown:
+                constraints.append((tuple(sorted(unknown)), mines_left))
+
+        # union the constraints that share a cell
+        parent = list(range(len(constraints)))
+
+        def find(number):
+            while parent[number] != number:
+                parent[number] = parent[parent[number]]
+                number = parent[number]
+            return number
+
+        owner: Dict[int, int] = {}
+        for number, (cells, _) in enumerate(constraints):
+            for cell in cells:
+                if cell in owner:
+                    parent[find(number)] = find(owner[cell])
+                else:
+                    owner[cell] = number
+
+        groups: Dict[int, List[Constraint]] = {}
+        for number, constraint in enumerate(constraints):
+            groups.setdefault(find(number), []).append(constraint)
+        # sorted so the same group always hits the same cache entry
+        return [tuple(sorted(set(group))) for group in groups.values()]
+
+    def heatmap(self) -> Heatmap:
+        """
+        Returns the chance of every hidden cell being a mine
+        """
+        board = self.board
+        solver = self.solver
+        heatmap = Heatmap(board.width)
+        components = [count_component(group) for group in self.components()]
+
+        for index in solver.safe:
+            heatmap.cells[index] = 0.0
+        for index in solver.mines:
+            heatmap.cells[index] = 1.0
+
+        # cells that aren't next to any number share the mines that are left
+        # once every group has taken its share
+        states = board.cell_states()
+        hidden = states.count(0) + states.count(FLAGGED)
+        frontier_cells = sum(len(cells) for cells, _ in components)
+        elsewhere = hidden - len(solver.safe) - len(solver.mines) - \
+            frontier_cells
+        mines = board.number_of_mines - len(solver.mines)
+
+        def weight(used):
+            # ways to place the rest of the mines in the other cells
+            if used > mines or mines - used > elsewhere:
+                return 0
+            return comb(elsewhere, mines - used)
+
+        distributions = [{used: ways for used, (ways, _) in counts.items()}
+                         for _, counts in components]
+        everything = {0: 1}
+        for distribution in distributions:
+            everything = convolve(everything, distribution)
+        total = sum(ways * weight(used) for used, ways in everything.items())
+        if not total:
+            return heatmap
+
+        for number, (cells, counts) in enumerate(components):
+            others = {0: 1}
+            for other, distribution in enumerate(distributions):
+                if other != number:
+                    others = convolve(others, distribution)
+            cell_weights = [0] * len(cells)
+            for used, (_, cell_counts) in counts.items():
+                rest = sum(ways * weight(used + other_used)
+                           for other_used, ways in others.items())
+                for position, cell_count in enumerate(cell_counts):
+                    cell_weights[position] += cell_count * rest
+            for cell, cell_weight in zip(cells, cell_weights):
+                heatmap.cells[cell] = cell_weight / total
+
+        if elsewhere:
+            expected = sum(ways * weight(used) * (mines - used)
+                           for used, ways in everything.items())
+            heatmap.elsewhere = expected / (total * elsewhere)
+        return heatmap
+
+    def safest_cell(self, heatmap: Optional[Heatmap] = None):
+        """
+        Returns the (x, y) of the hidden, unflagged cell least likely to be
+        a mine
+        """
+        board = self.board
+        heatmap = heatmap if heatmap is not None else self.heatmap()
+        best = None
+        best_probability = 2.0
+        for index, state in enumerate(board.cell_states()):
+            if state & (REVEALED | FLAGGED):
+                continue
+            probability = heatmap.cells.get(index, heatmap.elsewhere)
+            if probability < best_probability:
+                best = index
+                best_probability = probability
+        if best is None:
+            return None
+        return best % board.width, best // board.width
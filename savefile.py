@@ -0,0 +1,229 @@
+"""
+Saves Boards to a compact binary format and loads them back.
+
+Every board is stored as one record, a header:
+    magic     4 bytes  b'XSWP'
+    version   1 byte   FORMAT_VERSION
+    padding   3 bytes
+    width     4 bytes  unsigned
+    height    4 bytes  unsigned
+    mines     4 bytes  unsigned
+    seed      8 bytes  signed
+all little endian, followed by the mine, revealed and flagged bitmaps.
+Each bitmap holds one bit per cell, the cell at (x, y) being bit y*width+x
+counting from the lowest bit of the first byte, and takes
+(width*height+7)//8 bytes. A beginner board takes 61 bytes and records can
+be written one after another to archive many games in a single file.
+"""
+
+from typing import BinaryIO, Iterator
+import mmap
+import struct
+
+from explodey_sweeper import FLAGGED, REVEALED, Board, mask_indices
+
+MAGIC = b'XSWP'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sB3xIIIq')
+# Seeds that fit in the signed 8 byte field of the header
+MIN_SEED = -(1 << 63)
+MAX_SEED = (1 << 63) - 1
+
+# Order of the bitmaps after the header
+MINES = 0
+REVEALED_CELLS = 1
+FLAGGED_CELLS = 2
+
+
+def bitmap_size(width, height):
+    """
+    Returns the number of bytes a bitmap of a board of the provided size
+    takes
+    """
+    return (width * height + 7) // 8
+
+
+def record_size(width, height):
+    """
+    Returns the number of bytes the record of a board of the provided size
+    takes
+    """
+    return HEADER.size + 3 * bitmap_size(width, height)
+
+
+def decode_header(data):
+    """
+    Returns the width, height, mines and seed from the header at the start
+    of data. Raises ValueError if it isn't a header this version can read
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("file is too short to hold a board")
+    magic, version, width, height, mines, seed = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not an explodey sweeper board")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported board format version {version}")
+    return width, height, mines, seed
+
+
+def encode_board(board: Board) -> bytes:
+    """
+    Returns the record of the board. Raises ValueError if the seed doesn't
+    fit in the header
+    """
+    if not MIN_SEED <= board.seed <= MAX_SEED:
+        raise ValueError(f"seed {board.seed} is too large to save")
+    size = bitmap_size(board.width, board.height)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, board.width, board.height,
+                       board.number_of_mines, board.seed) + \
+        b''.join(mask.to_bytes(size, 'little') for mask in board.masks())
+
+
+def decode_board(data, board_class=Board) -> Board:
+    """
+    Returns the board held in the record at the start of data. Raises
+    ValueError if the record is cut short, its bitmaps have bits set past
+    the last cell or its mine bitmap doesn't match its mine count
+    """
+    width, height, mines, seed = decode_header(data)
+    size = bitmap_size(width, height)
+    if len(data) < record_size(width, height):
+        raise ValueError("file is too short to hold the whole board")
+    masks = [int.from_bytes(data[start:start + size], 'little')
+             for start in range(HEADER.size, HEADER.size + 3 * size, size)]
+    if any(mask >> (width * height) for mask in masks):
+        raise ValueError("bitmap has cells past the end of the board")
+    return build_board(width, height, mines, seed, *masks,
+                       board_class=board_class)
+
+
+def build_board(width, height, mines, seed, mine_mask, revealed_mask,
+                flagged_mask, board_class=Board) -> Board:
+    """
+    Returns a board_class with the provided size, seed and masks. Raises
+    ValueError if the mine mask doesn't hold as many mines as provided
+    """
+    # a board without mine locations places random ones, so a bitmap that
+    # lost its mines would come back as a different board
+    if mine_mask.bit_count() != mines:
+        raise ValueError(f"mine bitmap has {mine_mask.bit_count()} mines "
+                         f"instead of {mines}")
+    board = board_class(
+        width=width,
+        height=height,
+        number_of_mines=mines,
+        seed=seed,
+        mine_locations={(index % width, index // width)
+                        for index in mask_indices(mine_mask)},
+    )
+    board.load_masks(revealed_mask, flagged_mask)
+    return board
+
+
+def write_board(stream: BinaryIO, board: Board):
+    """
+    Writes the record of the board to a binary stream
+    """
+    stream.write(encode_board(board))
+
+
+def read_boards(stream: BinaryIO, board_class=Board) -> Iterator[Board]:
+    """
+    Yields every board written to a binary stream one after another
+    """
+    while True:
+        header = stream.read(HEADER.size)
+        if not header:
+            return
+        width, height, _, _ = decode_header(header)
+        data = header + stream.read(record_size(width, height) - HEADER.size)
+        yield decode_board(data, board_class)
+
+
+def save_board(path, board: Board):
+    """
+    Writes the board to a file. The record is built before the file is
+    opened so a board that can't be saved leaves the file untouched
+    """
+    record = encode_board(board)
+    with open(path, 'wb') as output:
+        output.write(record)
+
+
+def load_board(path, board_class=Board) -> Board:
+    """
+    Reads the board saved in a file
+    """
+    with BoardFile(path) as board_file:
+        return board_file.to_board(board_class)
+
+
+class BoardFile():
+    """
+    A saved board opened through mmap. Only the header is read when the
+    file is opened, cells are read straight from the file when they are
+    asked for so the operating system only pages in the parts of a huge
+    board that are used:
+    width, height, number_of_mines, seed: read from the header
+    """
+
+    def __init__(self, path, offset=0):
+        with open(path, 'rb') as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offset = offset
+        try:
+            self.width, self.height, self.number_of_mines, self.seed = \
+                decode_header(self._map[offset:offset + HEADER.size])
+            if len(self._map) < offset + record_size(self.width,
+                                                     self.height):
+                raise ValueError("file is too short to hold the whole board")
+        except ValueError:
+            self._map.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._map.close()
+
+    def _bit(self, bitmap, index):
+        start = self._offset + HEADER.size + \
+            bitmap * bitmap_size(self.width, self.height)
+        return (self._map[start + index // 8] >> (index % 8)) & 1
+
+    def is_mine(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) contains a mine
+        """
+        return bool(self._bit(MINES, y*self.width+x))
+
+    def cell_state(self, index):
+        """
+        returns the REVEALED and FLAGGED bits of the cell at the provided
+        index
+        """
+        return (REVEALED * self._bit(REVEALED_CELLS, index) |
+                FLAGGED * self._bit(FLAGGED_CELLS, index))
+
+    def is_revealed(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) is revealed
+        """
+        return bool(self._bit(REVEALED_CELLS, y*self.width+x))
+
+    def is_flagged(self, x, y):
+        """
+        returns True if the cell at the provided (x,y) is flagged
+        """
+        return bool(self._bit(FLAGGED_CELLS, y*self.width+x))
+
+    def to_board(self, board_class=Board) -> Board:
+        """
+        Reads the whole board into a board_class
+        """
+        end = self._offset + record_size(self.width, self.height)
+        return decode_board(self._map[self._offset:end], board_class)
@@ -0,0 +1,304 @@
+"""
+Hosts many games of explodey sweeper at once over TCP or a Unix socket.
+
+Every connection plays its own game by sending one command per line:
+    new width height mines [seed]   starts a new game
+    reveal 3a, flag 3a, unflag 3a   plays a move, a bare 3a is a reveal
+    chord 3a                        reveals around a satisfied number
+    reveal 3a 4b 12,30              plays a batch of moves at once
+    reset                           replays the current board
+    board                           sends the whole board
+    quit                            closes the connection
+and gets one line back for every command. Moves are answered with the
+state of the game, the mines left and the cells the move revealed, for
+example "play 9 44:1 45:░". Cells past the first 36 columns and rows are
+written as x,y.
+
+Running with --load starts a load generator that holds many sessions
+against a server and reports how many moves per second it gets through.
+"""
+
+from dataclasses import dataclass, field
+from typing import Optional
+import argparse
+import asyncio
+import random
+import time
+
+from explodey_sweeper import (
+    CELL_CHARACTERS,
+    DEFAULT_BOARD_HEIGHT,
+    DEFAULT_BOARD_WIDTH,
+    DEFAULT_MINE_COUNT,
+    STATE_CHARACTERS,
+    Board,
+    Controller,
+    Game,
+    State,
+    is_valid_board_setup,
+    position_label,
+)
+
+DEFAULT_PORT = 8923
+
+# Connections that can wait to be accepted, large enough for thousands of
+# clients connecting at once
+BACKLOG = 4096
+
+# A client that sends nothing for this many seconds is disconnected
+DEFAULT_IDLE_TIMEOUT = 300
+
+MOVES = (Controller.Commands.REVEAL.value, Controller.Commands.FLAG.value,
+         Controller.Commands.UNFLAG.value, Controller.Commands.CHORD.value)
+
+
+@dataclass
+class Session():
+    """
+    The game played over one connection
+    """
+    game: Game = field(default_factory=lambda: Game(Board()))
+
+    def handle(self, line: str) -> Optional[str]:
+        """
+        Applies one command and returns the line to send back, or None when
+        the client quit
+        """
+        words = line.strip().lower().split()
+        if not words:
+            return "error empty command"
+        if len(words) == 1 and Controller.validate_input_length(words[0]):
+            words.insert(0, Controller.Commands.REVEAL.value)
+
+        command = words[0]
+        if command == Controller.Commands.NEW.value:
+            return self.new_game(words[1:])
+        if command == Controller.Commands.RESET.value:
+            self.game.board.reset()
+            self.game = Game(self.game.board)
+            return "ok"
+        if command == "board":
+            return self.board()
+        if command == Controller.Commands.QUIT.value:
+            return None
+        if command in MOVES and len(words) >= 2:
+            return self.move(command, words[1:])
+        return "error unknown command"
+
+    def new_game(self, words):
+        """
+        Starts a new game from the width, height, mines and seed words
+        """
+        try:
+            width, height, num_mines = (int(word) for word in words[:3])
+            seed = int(words[3]) if len(words) > 3 else None
+        except ValueError:
+            return "error invalid board setup"
+        if not is_valid_board_setup(width, height, num_mines):
+            return "error invalid board setup"
+        self.game = Game(Board(width=width, height=height,
+                               number_of_mines=num_mines, seed=seed))
+        return f"ok {self.game.board.seed}"
+
+    def move(self, command, moves):
+        """
+        Plays a batch of moves with the same command and returns the state,
+        mines left and revealed cells
+        """
+        game = self.game
+        board = game.board
+        batch = []
+        for move in moves:
+            move_position = Controller.parse_position(move, board.width,
+                                                      board.height)
+            if move_position is None:
+                return "error invalid move"
+            batch.append((command, *move_position))
+
+        moves = game.moves
+        game.apply_moves(batch)
+        if game.moves == moves:
+            return "error move not allowed"
+        state = game.state
+        if state == State.PLAYER_LOST:
+            revealed = game.last_revealed | board.mine_locations
+        else:
+            revealed = game.last_revealed
+        cells = ' '.join(
+            f"{Controller.convert_xy_to_move(x, y)}:"
+            f"{CELL_CHARACTERS[board.counts[y*board.width+x]]}"
+            for x, y in revealed
+        )
+        return f"{state.value} {game.mines_left} {cells}".rstrip()
+
+    def board(self):
+        """
+        Returns every row of the board separated by slashes
+        """
+        board = self.game.board
+        states = board.cell_states()
+        rows = []
+        for start in range(0, board.width * board.height, board.width):
+            rows.append(''.join(
+                STATE_CHARACTERS[state][count]
+                for state, count in zip(
+                    states[start:start + board.width],
+                    board.counts[start:start + board.width])
+            ))
+        return f"board {board.width} {board.height} {'/'.join(rows)}"
+
+
+@dataclass
+class GameServer():
+    """
+    Accepts connections and plays a Session for each one:
+    idle_timeout: seconds a client can stay silent before it's dropped
+    sessions: number of sessions currently connected
+    commands: number of commands handled since the server started
+    """
+    idle_timeout: float = field(default=DEFAULT_IDLE_TIMEOUT)
+    sessions: int = field(default=0)
+    commands: int = field(default=0)
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+                            writer: asyncio.StreamWriter):
+        """
+        Plays one session until the client quits or disconnects
+        """
+        session = Session()
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(),
+                                                  self.idle_timeout)
+                except (asyncio.TimeoutError, ValueError):
+                    # silent clients and overlong lines end the session
+                    break
+                if not line:
+                    break
+
+                response = session.handle(line.decode(errors='replace'))
+                self.commands += 1
+                if response is None:
+                    break
+                writer.write(response.encode() + b'\n')
+                # waiting for the write buffer to drain only holds up this
+                # session, so a client that stops reading can't make the
+                # server buffer without limit or slow down anyone else
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=DEFAULT_PORT,
+                    unix_path: Optional[str] = None):
+        """
+        Serves sessions until cancelled
+        """
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(
+                self.handle_client, unix_path, backlog=BACKLOG)
+        else:
+            server = await asyncio.start_server(
+                self.handle_client, host, port, backlog=BACKLOG)
+        async with server:
+            await server.serve_forever()
+
+
+async def load_session(host, port, unix_path, seed, deadline, totals):
+    """
+    Plays random moves over one connection until the deadline, starting a
+    new game whenever one ends
+    """
+    if unix_path is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    rng = random.Random(seed)
+    totals["sessions"] += 1
+    try:
+        writer.write(f"new {DEFAULT_BOARD_WIDTH} {DEFAULT_BOARD_HEIGHT} "
+                     f"{DEFAULT_MINE_COUNT} {seed}\n".encode())
+        await writer.drain()
+        await reader.readline()
+        while time.perf_counter() < deadline:
+            move = (position_label(rng.randrange(DEFAULT_BOARD_WIDTH)) +
+                    position_label(rng.randrange(DEFAULT_BOARD_HEIGHT)))
+            writer.write(f"reveal {move}\n".encode())
+            await writer.drain()
+            response = await reader.readline()
+            if not response:
+                break
+            totals["moves"] += 1
+            if not response.startswith(b"play") and \
+                    not response.startswith(b"error"):
+                writer.write(f"new {DEFAULT_BOARD_WIDTH} "
+                             f"{DEFAULT_BOARD_HEIGHT} "
+                             f"{DEFAULT_MINE_COUNT}\n".encode())
+                await writer.drain()
+                await reader.readline()
+                totals["games"] += 1
+        writer.write(b"quit\n")
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def generate_load(sessions, seconds, host='127.0.0.1',
+                        port=DEFAULT_PORT, unix_path: Optional[str] = None):
+    """
+    Holds the provided number of sessions against a server for the provided
+    number of seconds and returns the totals
+    """
+    totals = {"sessions": 0, "moves": 0, "games": 0}
+    start = time.perf_counter()
+    deadline = start + seconds
+    results = await asyncio.gather(
+        *(load_session(host, port, unix_path, seed, deadline, totals)
+          for seed in range(sessions)),
+        return_exceptions=True
+    )
+    totals["seconds"] = time.perf_counter() - start
+    totals["errors"] = sum(isinstance(result, Exception)
+                           for result in results)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--host", default='127.0.0.1')
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="serve on a Unix socket path instead")
+    parser.add_argument("--idle-timeout", type=float,
+                        default=DEFAULT_IDLE_TIMEOUT)
+    parser.add_argument("--load", type=int, metavar="SESSIONS",
+                        help="run the load generator with this many "
+                             "sessions instead of serving")
+    parser.add_argument("--seconds", type=float, default=10,
+                        help="how long the load generator runs")
+    args = parser.parse_args()
+
+    if args.load:
+        totals = asyncio.run(generate_load(args.load, args.seconds,
+                                           args.host, args.port, args.unix))
+        print(f"Sessions held: {totals['sessions']}/{args.load} "
+              f"({totals['errors']} failed)")
+        print(f"Moves: {totals['moves']} in {totals['seconds']:.1f}s "
+              f"({totals['moves'] / totals['seconds']:.0f} moves/s)")
+        print(f"Games finished: {totals['games']}")
+    else:
+        server = GameServer(idle_timeout=args.idle_timeout)
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Plays many headless games of explodey sweeper across a pool of processes
+and reports how fast and how well a strategy plays
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, List, Tuple
+import argparse
+import json
+import os
+import time
+
+from explodey_sweeper import (
+    DEFAULT_BOARD_HEIGHT,
+    DEFAULT_BOARD_WIDTH,
+    DEFAULT_MINE_COUNT,
+    FLAGGED,
+    REVEALED,
+    Board,
+    Controller,
+    Game,
+    State,
+)
+from solver import SolverStrategy
+
+# A strategy is created with the game it plays and its next_move() method
+# returns the next (command, x, y) to play
+Move = Tuple[str, int, int]
+Strategy = Callable[[Game], object]
+
+
+class RandomStrategy():
+    """
+    Reveals random hidden cells. Once every hidden cell must be a mine the
+    remaining cells are flagged instead
+    """
+
+    def __init__(self, game: Game):
+        self.game = game
+
+    def next_move(self) -> Move:
+        board = self.game.board
+        hidden = [index for index, state in enumerate(board.cell_states())
+                  if not state & (REVEALED | FLAGGED)]
+        index = board.rng.choice(hidden)
+        x, y = index % board.width, index // board.width
+        if len(hidden) == self.game.mines_left:
+            return (Controller.Commands.FLAG.value, x, y)
+        return (Controller.Commands.REVEAL.value, x, y)
+
+
+@dataclass
+class GameResult():
+    """
+    The outcome of a single simulated game
+    """
+    seed: int
+    won: bool
+    moves: int
+
+
+@dataclass
+class BatchReport():
+    """
+    Totals for a batch of simulated games
+    """
+    games: int = field(default=0)
+    wins: int = field(default=0)
+    moves: int = field(default=0)
+    seconds: float = field(default=0.0)
+
+    @property
+    def win_rate(self):
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+    @property
+    def moves_per_game(self):
+        return self.moves / self.games if self.games else 0.0
+
+    def add(self, result: GameResult):
+        """
+        Adds the result of one game to the totals
+        """
+        self.games += 1
+        self.wins += result.won
+        self.moves += result.moves
+
+    def as_dict(self):
+        """
+        Returns the report as a dict that can be dumped as JSON
+        """
+        return {
+            "games": self.games,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "moves": self.moves,
+            "moves_per_game": self.moves_per_game,
+            "seconds": self.seconds,
+            "games_per_second": self.games_per_second,
+        }
+
+
+def play_game(width, height, mines, seed,
+              strategy: Strategy = SolverStrategy) -> GameResult:
+    """
+    Plays one seeded game to the end with the provided strategy
+    """
+    game = Game(Board(width=width, height=height, number_of_mines=mines,
+                      seed=seed))
+    player = strategy(game)
+    while game.state == State.PLAYING:
+        game.apply_move(*player.next_move())
+    return GameResult(seed, game.state == State.PLAYER_WON, game.moves)
+
+
+def _play_games(width, height, mines, seeds,
+                strategy: Strategy) -> List[GameResult]:
+    """
+    Plays a chunk of games inside a worker process
+    """
+    return [play_game(width, height, mines, seed, strategy)
+            for seed in seeds]
+
+
+def run_batch(games, width=DEFAULT_BOARD_WIDTH, height=DEFAULT_BOARD_HEIGHT,
+              mines=DEFAULT_MINE_COUNT, strategy: Strategy = SolverStrategy,
+              workers=None, seed=0) -> BatchReport:
+    """
+    Plays the games seeded seed, seed + 1, ... seed + games - 1 across a
+    pool of worker processes and returns the combined report. The strategy
+    must be a module level class so it can be sent to the workers
+    """
+    workers = workers or os.cpu_count() or 1
+    seeds = range(seed, seed + games)
+    # a few chunks per worker keeps every core busy without paying the
+    # cost of sending each game to a worker on its own
+    chunk_size = max(1, games // (workers * 4))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, games, chunk_size)]
+
+    report = BatchReport()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_play_games, width, height, mines, chunk,
+                               strategy)
+                   for chunk in chunks]
+        for future in futures:
+            for result in future.result():
+                report.add(result)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+# Strategies that can be picked from the command line
+STRATEGIES = {
+    "solver": SolverStrategy,
+    "random": RandomStrategy,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--width", type=int, default=DEFAULT_BOARD_WIDTH)
+    parser.add_argument("--height", type=int, default=DEFAULT_BOARD_HEIGHT)
+    parser.add_argument("--mines", type=int, default=DEFAULT_MINE_COUNT)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--strategy", choices=STRATEGIES, default="solver")
+    parser.add_argument("--json", action="store_true",
+                        help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = run_batch(args.games, args.width, args.height, args.mines,
+                       strategy=STRATEGIES[args.strategy],
+                       workers=args.workers, seed=args.seed)
+    if args.json:
+        print(json.dumps(report.as_dict()))
+    else:
+        print(f"Games: {report.games} in {report.seconds:.2f}s "
+              f"({report.games_per_second:.0f} games/s)")
+        print(f"Win rate: {report.win_rate:.2%}")
+        print(f"Moves per game: {report.moves_per_game:.1f}")
+
+
+if __name__ == "__main__":
+    main()
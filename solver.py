@@ -0,0 +1,240 @@
+"""
+Deduces safe cells and mines on a Board the same way a player would, from
+the numbers that have been revealed so far
+"""
+
+from typing import Iterable, List, Optional, Set, Tuple
+
+from explodey_sweeper import (
+    MINE_VALUE,
+    REVEALED,
+    Board,
+    Game,
+)
+
+# (command, x, y) tuples in the same format the Controller commands use
+Move = Tuple[str, int, int]
+
+REVEAL = "reveal"
+FLAG = "flag"
+
+# Offsets of every cell that can share a hidden neighbour with a cell
+NEARBY_CELLS = tuple(
+    (x, y) for y in range(-2, 3) for x in range(-2, 3) if x or y
+)
+
+
+class Solver():
+    """
+    Keeps track of the frontier, the revealed numbers with hidden
+    neighbours, and deduces which hidden cells are safe or mines:
+    board: the Board being solved
+    frontier: Set of cell indices of numbers that still have unknown
+        neighbours
+    safe: Set of cell indices known to be safe that are not revealed yet
+    mines: Set of cell indices known to be mines
+    The frontier is only updated around cells passed to update() and only
+    changed numbers are looked at again, so each move costs about the same
+    no matter how large the board is. Flags placed on the board are not
+    trusted, only mines the solver deduced itself are used
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.frontier: Set[int] = set()
+        self.safe: Set[int] = set()
+        self.mines: Set[int] = set()
+        # mines that haven't been flagged on the board yet
+        self._unflagged_mines: Set[int] = set()
+        # numbers whose constraint changed since they were last looked at
+        self._changed: Set[int] = set()
+
+        # pick up whatever is already revealed, after this the frontier is
+        # only ever updated from the cells passed to update()
+        self.update(
+            (index % board.width, index // board.width)
+            for index, state in enumerate(board.cell_states())
+            if state & REVEALED
+        )
+
+    def nearby(self, index):
+        """
+        Returns the indices of the cells up to two cells away from index
+        that are on the board
+        """
+        width = self.board.width
+        height = self.board.height
+        center_x = index % width
+        center_y = index // width
+        cells = []
+        for offset in NEARBY_CELLS:
+            x = center_x + offset[0]
+            y = center_y + offset[1]
+            if 0 <= x < width and 0 <= y < height:
+                cells.append(y*width+x)
+        return cells
+
+    def update(self, revealed: Iterable[Tuple[int, int]]):
+        """
+        Updates the frontier with the (x, y) cells that were just revealed
+        """
+        counts = self.board.counts
+        width = self.board.width
+        for x, y in revealed:
+            index = y*width+x
+            self.safe.discard(index)
+            if 0 < counts[index] < MINE_VALUE:
+                self.frontier.add(index)
+                self._changed.add(index)
+            self._mark_neighbours_changed(index)
+
+    def _mark_neighbours_changed(self, index):
+        """
+        Queues the numbers around index to be looked at again
+        """
+        for neighbour in self.board.neighbours[index]:
+            if neighbour in self.frontier:
+                self._changed.add(neighbour)
+
+    def constraint(self, index):
+        """
+        Returns the set of unknown cells around the number at index and how
+        many mines are still hidden among them
+        """
+        board = self.board
+        unknown = set()
+        mines_left = board.counts[index]
+        for neighbour in self.board.neighbours[index]:
+            if neighbour in self.mines:
+                mines_left -= 1
+            elif (neighbour not in self.safe and
+                    not board.cell_state(neighbour) & REVEALED):
+                unknown.add(neighbour)
+        return unknown, mines_left
+
+    def _mark_safe(self, cells: Iterable[int]):
+        """
+        Records cells as safe and returns True if any of them were new
+        """
+        found = False
+        for index in cells:
+            if index not in self.safe:
+                self.safe.add(index)
+                self._mark_neighbours_changed(index)
+                found = True
+        return found
+
+    def _mark_mines(self, cells: Iterable[int]):
+        """
+        Records cells as mines and returns True if any of them were new
+        """
+        found = False
+        for index in cells:
+            if index not in self.mines:
+                self.mines.add(index)
+                self._unflagged_mines.add(index)
+                self._mark_neighbours_changed(index)
+                found = True
+        return found
+
+    def deduce(self):
+        """
+        Works through the changed numbers until nothing more can be deduced
+        """
+        while self._changed:
+            index = self._changed.pop()
+            if index not in self.frontier:
+                continue
+            unknown, mines_left = self.constraint(index)
+
+            # numbers with nothing left to find are no longer on the frontier
+            if not unknown:
+                self.frontier.discard(index)
+                continue
+
+            # every mine around the number is found so the rest are safe
+            if mines_left == 0:
+                self._mark_safe(unknown)
+                continue
+            # there are as many mines left as unknown cells
+            if mines_left == len(unknown):
+                self._mark_mines(unknown)
+                continue
+
+            # compare with every number that shares unknown cells with this
+            # one. If the difference in mines left between the two numbers
+            # fills up all of the cells only one number can see, those cells
+            # are mines and the cells only the other number sees are safe
+            for other in self.nearby(index):
+                if other not in self.frontier:
+                    continue
+                other_unknown, other_mines_left = self.constraint(other)
+                if not unknown & other_unknown:
+                    continue
+                only_here = unknown - other_unknown
+                only_there = other_unknown - unknown
+                if mines_left - other_mines_left == len(only_here):
+                    found = self._mark_mines(only_here)
+                    found |= self._mark_safe(only_there)
+                elif other_mines_left - mines_left == len(only_there):
+                    found = self._mark_mines(only_there)
+                    found |= self._mark_safe(only_here)
+                else:
+                    found = False
+                if found:
+                    # this number changed so it gets looked at again
+                    self._changed.add(index)
+                    break
+
+    def moves(self) -> List[Move]:
+        """
+        Returns every move that is certain to be correct
+        """
+        self.deduce()
+        board = self.board
+        width = board.width
+        moves = []
+        for index in self.safe:
+            x, y = index % width, index // width
+            if not board.is_flagged(x, y):
+                moves.append((REVEAL, x, y))
+        for index in list(self._unflagged_mines):
+            x, y = index % width, index // width
+            if board.is_flagged(x, y):
+                self._unflagged_mines.discard(index)
+            else:
+                moves.append((FLAG, x, y))
+        return moves
+
+    def next_move(self) -> Optional[Move]:
+        """
+        Returns a move that is certain to be correct or None if there isn't
+        one. Safe cells come first, then mines that haven't been flagged
+        """
+        moves = self.moves()
+        return moves[0] if moves else None
+
+
+class SolverStrategy():
+    """
+    Plays a Game with the Solver. Whenever nothing can be deduced it guesses
+    the cell least likely to be a mine
+    """
+
+    def __init__(self, game: Game):
+        # imported here since the probability engine is built on the solver
+        from probability import ProbabilityEngine
+
+        self.game = game
+        self.solver = Solver(game.board)
+        self.probabilities = ProbabilityEngine(game.board, self.solver)
+
+    def next_move(self) -> Move:
+        """
+        Returns the next (command, x, y) to play
+        """
+        self.solver.update(self.game.last_revealed)
+        move = self.solver.next_move()
+        if move is not None:
+            return move
+        return (REVEAL, *self.probabilities.safest_cell())
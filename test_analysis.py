@@ -0,0 +1,53 @@
+"""
+Checks the metrics of analyze_board against clicking through seeded boards
+with the game's own flood fill
+"""
+
+from analysis import analyze_board
+from explodey_sweeper import MINE_VALUE, Board
+
+# (width, height, mines) of the boards, every seed uses one in turn
+SETUPS = ((9, 9, 10), (16, 16, 40), (30, 16, 99), (8, 8, 1))
+BOARDS = 400
+
+
+def click_through(board):
+    """
+    Returns the size of every opening and the number of isolated numbers
+    found by clicking every empty cell that is still hidden and then every
+    numbered cell that is still hidden
+    """
+    width = board.width
+    openings = []
+    clicked = set()
+    empty = [index for index, count in enumerate(board.counts) if count == 0]
+    for index in empty:
+        position = (index % width, index // width)
+        if position in clicked:
+            continue
+        # each opening is measured on its own, so the numbers it shares with
+        # another opening count for both
+        board.reset()
+        revealed = board.reveal_cell(*position)
+        openings.append(len(revealed))
+        clicked |= revealed
+    isolated_numbers = sum(
+        1 for index, count in enumerate(board.counts)
+        if count != MINE_VALUE and
+        (index % width, index // width) not in clicked)
+    return openings, isolated_numbers
+
+
+def test_analyze_board_matches_flood_fill():
+    for seed in range(BOARDS):
+        width, height, mines = SETUPS[seed % len(SETUPS)]
+        metrics = analyze_board(Board(width=width, height=height,
+                                      number_of_mines=mines, seed=seed))
+        openings, isolated_numbers = click_through(
+            Board(width=width, height=height, number_of_mines=mines,
+                  seed=seed))
+        assert metrics.three_bv == len(openings) + isolated_numbers, seed
+        assert metrics.openings == len(openings), seed
+        assert metrics.opening_cells == sum(openings), seed
+        assert metrics.largest_opening == max(openings, default=0), seed
+        assert metrics.isolated_numbers == isolated_numbers, seed
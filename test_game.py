@@ -0,0 +1,54 @@
+"""
+Checks that batches of moves leave the board in a state a single move could
+"""
+
+import pytest
+
+from explodey_sweeper import (
+    FLAGGED,
+    MINE_VALUE,
+    REVEALED,
+    BitBoard,
+    Board,
+    Game,
+)
+
+
+@pytest.mark.parametrize("board_class", (Board, BitBoard))
+def test_batch_cannot_flag_cells_it_reveals(board_class):
+    board = board_class(width=9, height=9, number_of_mines=10, seed=3)
+    game = Game(board, safe_first_click=False)
+    index = next(index for index, count in enumerate(board.counts)
+                 if 0 < count < MINE_VALUE)
+    x, y = index % board.width, index // board.width
+
+    rejected = game.apply_moves([("reveal", x, y), ("flag", x, y),
+                                 ("reveal", x, y)])
+    assert len(rejected) == 2
+    assert board.cell_state(index) == REVEALED
+    assert game.mines_left == board.number_of_mines
+    assert not game.flagged_locations
+
+
+@pytest.mark.parametrize("board_class", (Board, BitBoard))
+def test_batch_cannot_flag_cells_a_chord_reveals(board_class):
+    board = board_class(width=9, height=9, number_of_mines=10, seed=3)
+    game = Game(board, safe_first_click=False)
+    index = next(
+        index for index, count in enumerate(board.counts)
+        if 0 < count < MINE_VALUE and
+        any(board.counts[neighbour] != MINE_VALUE
+            for neighbour in board.neighbours[index]))
+    mines = [neighbour for neighbour in board.neighbours[index]
+             if board.counts[neighbour] == MINE_VALUE]
+    safe = [neighbour for neighbour in board.neighbours[index]
+            if board.counts[neighbour] != MINE_VALUE]
+    game.apply_move("reveal", index % board.width, index // board.width)
+
+    game.apply_moves(
+        [("flag", mine % board.width, mine // board.width) for mine in mines] +
+        [("chord", index % board.width, index // board.width)] +
+        [("flag", cell % board.width, cell // board.width) for cell in safe])
+    for cell in safe:
+        assert board.cell_state(cell) & (REVEALED | FLAGGED) == REVEALED
+    assert game.mines_left == board.number_of_mines - len(mines)
@@ -0,0 +1,81 @@
+"""
+Checks the exact mine probabilities against counting every placement of
+the mines on small seeded boards
+"""
+
+from fractions import Fraction
+from itertools import combinations, product
+import random
+
+import pytest
+
+from explodey_sweeper import MINE_VALUE, REVEALED, Board
+from probability import ProbabilityEngine, count_component
+
+WIDTH = 5
+HEIGHT = 5
+MINES = 5
+SEEDS = range(40)
+
+
+def partly_revealed_board(seed):
+    """
+    Returns a 5x5 board with a few of its safe cells revealed
+    """
+    board = Board(width=WIDTH, height=HEIGHT, number_of_mines=MINES,
+                  seed=seed)
+    rng = random.Random(seed)
+    safe = [index for index, count in enumerate(board.counts)
+            if count != MINE_VALUE]
+    for index in rng.sample(safe, rng.randint(1, 3)):
+        board.reveal_cell(index % WIDTH, index // WIDTH)
+    return board
+
+
+def enumerate_probabilities(board):
+    """
+    Returns the chance of every hidden cell being a mine, found by trying
+    every placement of the mines in the hidden cells
+    """
+    states = board.cell_states()
+    hidden = [index for index, state in enumerate(states)
+              if not state & REVEALED]
+    numbers = [(set(board.neighbours[index]), board.counts[index])
+               for index, state in enumerate(states) if state & REVEALED]
+    placements = 0
+    mine_counts = dict.fromkeys(hidden, 0)
+    for mines in combinations(hidden, board.number_of_mines):
+        mines = set(mines)
+        if all(len(cells & mines) == count for cells, count in numbers):
+            placements += 1
+            for index in mines:
+                mine_counts[index] += 1
+    return {index: Fraction(count, placements)
+            for index, count in mine_counts.items()}
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_heatmap_matches_enumeration(seed):
+    board = partly_revealed_board(seed)
+    heatmap = ProbabilityEngine(board).heatmap()
+    for index, expected in enumerate_probabilities(board).items():
+        assert heatmap.probability(index % WIDTH, index // WIDTH) == \
+            pytest.approx(float(expected))
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_count_component_matches_enumeration(seed):
+    engine = ProbabilityEngine(partly_revealed_board(seed))
+    for group in engine.components():
+        cells, counts = count_component(group)
+        expected = {}
+        for values in product((0, 1), repeat=len(cells)):
+            mines = {cell for cell, value in zip(cells, values) if value}
+            if any(len(mines.intersection(constraint_cells)) != count
+                   for constraint_cells, count in group):
+                continue
+            ways, cell_counts = expected.get(len(mines),
+                                             (0, (0,) * len(cells)))
+            expected[len(mines)] = (ways + 1, tuple(
+                total + value for total, value in zip(cell_counts, values)))
+        assert counts == expected